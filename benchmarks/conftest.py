@@ -0,0 +1,172 @@
+import gc
+import json
+import os
+import time
+
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import mixer as _mixer
+
+from benchmarks import seed
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+# Небольшой запас по задержке, чтобы быстрые маршруты не мигали
+# из-за шума планировщика.
+LATENCY_SLACK_MS = 10
+# Первые запросы компилируют шаблоны и прогревают соединение,
+# поэтому в замеры не попадают.
+WARMUP_ROUNDS = 3
+
+results = {}
+slow = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmarks')
+    group.addoption(
+        '--bench-scale', type=float, default=0.01,
+        help='Доля от полного объема данных (1.0 = 1M постов, 100k '
+             'пользователей).',
+    )
+    group.addoption(
+        '--bench-rounds', type=int, default=30,
+        help='Сколько раз запрашивать каждый маршрут.',
+    )
+    group.addoption(
+        '--bench-tolerance', type=float, default=1.5,
+        help='Во сколько раз задержка может превысить базовую.',
+    )
+    group.addoption(
+        '--bench-latency-gate', action='store_true',
+        help='Проваливать прогон, если p50 превысил допустимый.',
+    )
+    group.addoption(
+        '--bench-update', action='store_true',
+        help='Записать результаты прогона как новые базовые значения.',
+    )
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = min(round(percent / 100 * (len(values) - 1)), len(values) - 1)
+    return values[index]
+
+
+def _scale_key(config):
+    return str(config.getoption('--bench-scale'))
+
+
+def _load_baselines():
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH, encoding='utf-8') as file:
+        return json.load(file)
+
+
+@pytest.fixture(scope='session')
+def bench_user(request, django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        return seed.seed(
+            _mixer.faker, request.config.getoption('--bench-scale')
+        )
+
+
+class Bench:
+    def __init__(self, config, name):
+        self.name = name
+        self.rounds = config.getoption('--bench-rounds')
+        self.tolerance = config.getoption('--bench-tolerance')
+        self.latency_gate = config.getoption('--bench-latency-gate')
+        self.baseline = None
+        if not config.getoption('--bench-update'):
+            self.baseline = _load_baselines().get(
+                _scale_key(config), {}
+            ).get(name)
+
+    def __call__(self, request):
+        """Замеряет холодный запрос: кэш страниц очищается каждый раз,
+        а изменения в базе откатываются после каждого раунда."""
+        timings, queries = [], []
+        for _ in range(WARMUP_ROUNDS):
+            with transaction.atomic():
+                request()
+                transaction.set_rollback(True)
+        for _ in range(self.rounds):
+            cache.clear()
+            # Паузы сборщика мусора от предыдущих раундов не должны
+            # попадать в замер текущего запроса.
+            gc.collect()
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = request()
+                    timings.append((time.perf_counter() - started) * 1000)
+                transaction.set_rollback(True)
+            assert response.status_code < 400, (
+                f'{self.name}: статус {response.status_code}'
+            )
+            queries.append(len(captured))
+        result = {
+            'queries': max(queries),
+            'p50_ms': round(_percentile(timings, 50), 2),
+            'p99_ms': round(_percentile(timings, 99), 2),
+        }
+        results[self.name] = result
+        self.check(result)
+        return result
+
+    def check(self, result):
+        """Проваливает тест, только если выросло число запросов.
+
+        Задержка зависит от машины и ее загрузки, поэтому рост p50
+        попадает в отчет, а проваливает тест только с
+        `--bench-latency-gate`. p99 по нескольким десяткам раундов
+        слишком шумный и не проверяется.
+        """
+        if self.baseline is None:
+            return
+        assert result['queries'] <= self.baseline['queries'], (
+            f'{self.name}: {result["queries"]} запросов к базе вместо '
+            f'{self.baseline["queries"]}'
+        )
+        limit = self.baseline['p50_ms'] * self.tolerance + LATENCY_SLACK_MS
+        if result['p50_ms'] > limit:
+            message = (
+                f'{self.name}: p50 = {result["p50_ms"]} мс, '
+                f'допустимо до {limit:.2f} мс'
+            )
+            assert not self.latency_gate, message
+            slow.append(message)
+
+
+@pytest.fixture
+def bench(request):
+    return Bench(request.config, request.node.callspec.id)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not results:
+        return
+    terminalreporter.section('benchmarks')
+    terminalreporter.write_line(
+        f'{"маршрут":<24}{"запросов":>10}{"p50, мс":>12}{"p99, мс":>12}'
+    )
+    for name, result in sorted(results.items()):
+        terminalreporter.write_line(
+            f'{name:<24}{result["queries"]:>10}'
+            f'{result["p50_ms"]:>12}{result["p99_ms"]:>12}'
+        )
+    if slow:
+        terminalreporter.write_line('Медленнее базовых значений:')
+        for message in slow:
+            terminalreporter.write_line(f'  {message}')
+    if config.getoption('--bench-update'):
+        baselines = _load_baselines()
+        baselines.setdefault(_scale_key(config), {}).update(results)
+        with open(BASELINES_PATH, 'w', encoding='utf-8') as file:
+            json.dump(baselines, file, ensure_ascii=False, indent=2,
+                      sort_keys=True)
+            file.write('\n')
+        terminalreporter.write_line(f'Базовые значения: {BASELINES_PATH}')
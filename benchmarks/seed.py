@@ -0,0 +1,139 @@
+"""Наполнение базы для бенчмарков.
+
+Объемы заданы для масштаба 1.0 и умножаются на `--bench-scale`.
+Записи создаются через `bulk_create`, поэтому счетчики и ленты
+пересчитываются отдельно, как после импорта данных. У самого
+популярного автора подписчиков больше `TIMELINE_FANOUT_LIMIT`, чтобы
+лента подписок проходила и через `timeline.pull`.
+"""
+import random
+from itertools import accumulate
+
+from django.conf import settings
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from posts import counters, timeline
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+USERS = 100_000
+POSTS = 1_000_000
+COMMENTS = 500_000
+GROUPS = 50
+MAX_FOLLOWS = 20
+BENCH_FOLLOWS = 50
+BATCH_SIZE = 5000
+SEED = 20231023
+
+BENCH_USERNAME = 'BenchUser'
+
+
+def _scaled(value, scale):
+    return max(int(value * scale), 1)
+
+
+def _zipf(size):
+    """Накопленные веса распределения Ципфа: первые записи популярнее."""
+    return list(accumulate(1 / (rank + 1) ** 1.1 for rank in range(size)))
+
+
+def _skewed(rng, population, count, cum_weights):
+    return rng.choices(population, cum_weights=cum_weights, k=count)
+
+
+def _bulk_create(model, objects):
+    for start in range(0, len(objects), BATCH_SIZE):
+        model.objects.bulk_create(objects[start:start + BATCH_SIZE])
+
+
+def seed(faker, scale):
+    rng = random.Random(SEED)
+    faker.seed_instance(SEED)
+    words = faker.words(nb=500)
+
+    def text(size):
+        return ' '.join(rng.choices(words, k=size))
+
+    password = make_password(None)
+    _bulk_create(User, [
+        User(username=f'user{number}', password=password)
+        for number in range(_scaled(USERS, scale))
+    ])
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    user_weights = _zipf(len(user_ids))
+
+    _bulk_create(Group, [
+        Group(
+            title=faker.sentence(nb_words=3)[:200],
+            slug=f'group-{number}',
+            description=text(20),
+        )
+        for number in range(GROUPS)
+    ])
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+
+    posts = _scaled(POSTS, scale)
+    authors = _skewed(rng, user_ids, posts, user_weights)
+    _bulk_create(Post, [
+        Post(
+            text=text(rng.randint(5, 80)),
+            author_id=author_id,
+            group_id=rng.choice(group_ids) if rng.random() < 0.6 else None,
+        )
+        for author_id in authors
+    ])
+    post_ids = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+
+    follows = set()
+    for user_id in user_ids:
+        for author_id in _skewed(
+            rng, user_ids, rng.randint(0, MAX_FOLLOWS), user_weights
+        ):
+            if author_id != user_id:
+                follows.add((user_id, author_id))
+    celebrity_id = user_ids[0]
+    fans = settings.TIMELINE_FANOUT_LIMIT + 1 - sum(
+        author_id == celebrity_id for _, author_id in follows
+    )
+    if fans > 0:
+        _bulk_create(User, [
+            User(username=f'fan{number}', password=password)
+            for number in range(fans)
+        ])
+        follows.update(
+            (fan_id, celebrity_id)
+            for fan_id in User.objects.filter(
+                username__startswith='fan'
+            ).values_list('pk', flat=True)
+        )
+    _bulk_create(Follow, [
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id, author_id in follows
+    ])
+
+    comment_posts = _skewed(
+        rng, post_ids[::-1], _scaled(COMMENTS, scale), _zipf(len(post_ids))
+    )
+    _bulk_create(Comment, [
+        Comment(
+            post_id=post_id,
+            author_id=rng.choice(user_ids),
+            text=text(rng.randint(3, 30)),
+        )
+        for post_id in comment_posts
+    ])
+
+    bench_user = User.objects.create_user(username=BENCH_USERNAME)
+    Post.objects.create(text=text(40), author=bench_user)
+    for author in User.objects.filter(
+        pk__in=user_ids[:BENCH_FOLLOWS]
+    ).iterator():
+        Follow.objects.get_or_create(user=bench_user, author=author)
+        timeline.backfill(bench_user, author)
+
+    counters.recount_users(BATCH_SIZE)
+    counters.recount_comments()
+    return bench_user
@@ -0,0 +1,84 @@
+import pytest
+from django.urls import reverse
+
+from core.paginator import KeysetPaginator
+from api import urls as api_urls
+from posts import urls
+from posts.models import Group, Post, User
+
+POPULAR_AUTHOR = 'user0'
+
+
+def _popular_post():
+    return Post.objects.filter(author__username=POPULAR_AUTHOR).latest(
+        'pub_date', 'pk'
+    )
+
+
+ROUTES = {
+    'index': ('get', False, lambda user: reverse('posts:index')),
+    'group_list': ('get', False, lambda user: reverse(
+        'posts:group_list', args=(Group.objects.order_by('pk')[0].slug,)
+    )),
+    'profile': ('get', False, lambda user: reverse(
+        'posts:profile', args=(POPULAR_AUTHOR,)
+    )),
+    'search': ('get', False, lambda user: reverse('posts:search') + '?q=' + (
+        Post.objects.filter(author__username=POPULAR_AUTHOR).values_list(
+            'text', flat=True
+        )[0].split()[0]
+    )),
+    'post_detail': ('get', False, lambda user: reverse(
+        'posts:post_detail', args=(_popular_post().pk,)
+    )),
+    'post_comments': ('get', False, lambda user: reverse(
+        'posts:post_comments', args=(_popular_post().pk,)
+    ) + '?after=' + KeysetPaginator(
+        _popular_post().comment.all(), 1, ordering=('created', 'id')
+    ).get_page().next_cursor),
+    'post_create': ('get', True, lambda user: reverse('posts:post_create')),
+    'post_edit': ('get', True, lambda user: reverse(
+        'posts:post_edit', args=(user.posts.latest('pub_date').pk,)
+    )),
+    'add_comment': ('post', True, lambda user: reverse(
+        'posts:add_comment', args=(_popular_post().pk,)
+    )),
+    'follow_index': ('get', True, lambda user: reverse('posts:follow_index')),
+    'profile_follow': ('get', True, lambda user: reverse(
+        'posts:profile_follow',
+        args=(User.objects.exclude(following__user=user).exclude(
+            pk=user.pk
+        ).order_by('pk')[0].username,),
+    )),
+    'profile_unfollow': ('get', True, lambda user: reverse(
+        'posts:profile_unfollow', args=(POPULAR_AUTHOR,)
+    )),
+    'api_posts': ('get', False, lambda user: reverse('api:posts')),
+    'api_group_posts': ('get', False, lambda user: reverse(
+        'api:group_posts', args=(Group.objects.order_by('pk')[0].slug,)
+    )),
+    'api_profile_posts': ('get', False, lambda user: reverse(
+        'api:profile_posts', args=(POPULAR_AUTHOR,)
+    )),
+    'api_follow': ('get', True, lambda user: reverse('api:follow')),
+}
+
+
+def test_every_route_is_benchmarked():
+    names = {pattern.name for pattern in urls.urlpatterns} | {
+        f'api_{pattern.name}' for pattern in api_urls.urlpatterns
+    }
+    assert names == set(ROUTES), (
+        f'Добавьте маршруты в ROUTES: {sorted(names - set(ROUTES))}'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', sorted(ROUTES), ids=sorted(ROUTES))
+def test_route(name, bench, bench_user, client):
+    method, login, build_url = ROUTES[name]
+    if login:
+        client.force_login(bench_user)
+    url = build_url(bench_user)
+    data = {'text': 'Комментарий из бенчмарка'} if method == 'post' else None
+    bench(lambda: getattr(client, method)(url, data))
@@ -0,0 +1,9 @@
+import pytest
+
+from core.runner import temporary_metrics_dir
+
+
+@pytest.fixture(autouse=True, scope='session')
+def metrics_dir():
+    with temporary_metrics_dir():
+        yield
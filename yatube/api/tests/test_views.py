@@ -0,0 +1,138 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.tests import constants
+from posts.tests.utils import run_on_commit
+from posts.views import POST_COUNT
+
+POSTS_URL = reverse('api:posts')
+FOLLOW_URL = reverse('api:follow')
+
+
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        cls.reader = User.objects.create_user(
+            username=constants.USER_USERNAME
+        )
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        with run_on_commit():
+            for number in range(POST_COUNT + 3):
+                Post.objects.create(
+                    text=f'{constants.POST_TEXT} {number}',
+                    author=cls.author,
+                    group=cls.group,
+                )
+        cls.texts = list(Post.objects.order_by(
+            '-pub_date', '-id'
+        ).values_list('text', flat=True))
+        cls.group_url = reverse('api:group_posts', args=(cls.group.slug,))
+        cls.profile_url = reverse(
+            'api:profile_posts', args=(cls.author.username,)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = self.client_class()
+        self.reader_client.force_login(self.reader)
+
+    def walk(self, client, url):
+        texts, params = [], {'fields': 'text'}
+        while True:
+            data = client.get(url, params).json()
+            texts.extend(post['text'] for post in data['results'])
+            if not data['next']:
+                return texts
+            params['after'] = data['next']
+
+    def test_feeds_walk_all_posts(self):
+        feeds = {
+            POSTS_URL: self.client,
+            self.group_url: self.client,
+            self.profile_url: self.client,
+            FOLLOW_URL: self.reader_client,
+        }
+        for url, client in feeds.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.walk(client, url), self.texts)
+
+    def test_default_fields(self):
+        post = self.client.get(POSTS_URL).json()['results'][0]
+        self.assertEqual(post['text'], self.texts[0])
+        self.assertEqual(post['author'], self.author.username)
+        self.assertEqual(post['group'], self.group.slug)
+        self.assertIsNone(post['image'])
+        self.assertEqual(post['comment_count'], 0)
+        self.assertIn('pub_date', post)
+
+    def test_fields_limit_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(POSTS_URL, {'fields': 'id,author'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'author'})
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"text"', sql)
+        self.assertNotIn('posts_group', sql)
+        self.assertIn('"username"', sql)
+
+    def test_unknown_field(self):
+        response = self.client.get(POSTS_URL, {'fields': 'text,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_objects(self):
+        urls = (
+            reverse('api:group_posts', args=('missing',)),
+            reverse('api:profile_posts', args=('missing',)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_follow_requires_login(self):
+        self.assertEqual(self.client.get(FOLLOW_URL).status_code, 401)
+
+    def test_etags(self):
+        feeds = {
+            POSTS_URL: self.client,
+            self.group_url: self.client,
+            self.profile_url: self.client,
+            FOLLOW_URL: self.reader_client,
+        }
+        for url, client in feeds.items():
+            with self.subTest(url=url):
+                etag = client.get(url)['ETag']
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_etag(self):
+        etag = self.client.get(POSTS_URL)['ETag']
+        Post.objects.create(text=constants.POST_TEXT, author=self.author)
+        response = self.client.get(POSTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_comment_changes_etag_with_comment_count(self):
+        post = Post.objects.latest('pub_date', 'id')
+        etag = self.client.get(POSTS_URL)['ETag']
+        text_etag = self.client.get(POSTS_URL, {'fields': 'text'})['ETag']
+        Comment.objects.create(
+            post=post, author=self.reader, text=constants.COMMENT_TEXT
+        )
+        response = self.client.get(POSTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['comment_count'], 1)
+        response = self.client.get(
+            POSTS_URL, {'fields': 'text'}, HTTP_IF_NONE_MATCH=text_etag
+        )
+        self.assertEqual(response.status_code, 304)
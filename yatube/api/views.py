@@ -0,0 +1,153 @@
+import hashlib
+from functools import wraps
+
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from core.paginator import KeysetPaginator
+from posts import timeline
+from posts.models import Group, Post, User
+from posts.page_cache import conditional_feed
+from posts.views import POST_COUNT
+
+# Поле ответа: (поля модели для .only(), связь для select_related,
+# функция, достающая значение из поста).
+FIELDS = {
+    'id': ((), None, lambda post: post.id),
+    'text': (('text',), None, lambda post: post.text),
+    'pub_date': (('pub_date',), None, lambda post: post.pub_date),
+    'author': (
+        ('author__username',), 'author',
+        lambda post: post.author.username if post.author_id else None,
+    ),
+    'group': (
+        ('group__slug',), 'group',
+        lambda post: post.group.slug if post.group_id else None,
+    ),
+    'image': (
+        ('image',), None, lambda post: post.image.url if post.image else None,
+    ),
+    'comment_count': (
+        ('comment_count',), None, lambda post: post.comment_count,
+    ),
+}
+DEFAULT_FIELDS = tuple(FIELDS)
+
+
+def error(detail, status):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def parse_fields(request):
+    """Поля из `?fields=a,b` или None, если среди них есть неизвестные."""
+    value = request.GET.get('fields')
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()
+    ))
+    if not fields or not set(fields) <= set(FIELDS):
+        return None
+    return fields
+
+
+def project(posts, fields, ordering):
+    """Загружает из базы только запрошенные поля и ключи курсора."""
+    columns = {field.name for field in Post._meta.concrete_fields}
+    only = {key.lstrip('-') for key in ordering} & columns
+    relations = []
+    for name in fields:
+        paths, relation, _ = FIELDS[name]
+        only.update(paths)
+        if relation:
+            relations.append(relation)
+    return posts.select_related(None).select_related(*relations).only(*only)
+
+
+def serialize(page, fields):
+    getters = [(name, FIELDS[name][2]) for name in fields]
+    return {
+        'results': [
+            {name: getter(post) for name, getter in getters}
+            for post in page
+        ],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def feed_response(request, posts, ordering=('-pub_date', '-id')):
+    fields = parse_fields(request)
+    if fields is None:
+        return error(
+            f'Допустимые поля: {", ".join(FIELDS)}.', status=400
+        )
+    paginator = KeysetPaginator(
+        project(posts, fields, ordering), POST_COUNT, ordering=ordering
+    )
+    page = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return JsonResponse(serialize(page, fields))
+
+
+def feed_scopes(scope):
+    """Области ETag ленты API: лента и, если отдается, счетчик комментариев.
+
+    Комментарий меняет `comment_count`, не трогая ленту, поэтому ответы
+    с этим полем зависят еще от области `comments`.
+    """
+    def scopes(request, **kwargs):
+        page_scopes = [scope(**kwargs)]
+        if 'comment_count' in (parse_fields(request) or ()):
+            page_scopes.append('comments')
+        return page_scopes
+    return scopes
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error('Нужна авторизация.', status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@conditional_feed(feed_scopes(lambda: 'index'))
+def posts(request):
+    return feed_response(request, Post.objects.select_related(
+        'group', 'author'
+    ).all())
+
+
+@conditional_feed(feed_scopes(lambda slug: f'group:{slug}'))
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        return error('Группа не найдена.', status=404)
+    return feed_response(request, group.posts.select_related('author'))
+
+
+@conditional_feed(feed_scopes(lambda username: f'author:{username}'))
+def profile_posts(request, username):
+    author = User.objects.filter(username=username).first()
+    if author is None:
+        return error('Пользователь не найден.', status=404)
+    return feed_response(request, author.posts.select_related('group'))
+
+
+@api_login_required
+def follow(request):
+    response = feed_response(
+        request,
+        timeline.feed(request.user),
+        ordering=('-feed_pub_date', '-feed_post_id'),
+    )
+    # Лента подписок не привязана к поколениям кэша, поэтому ETag
+    # считается по содержимому: клиент экономит хотя бы трафик.
+    etag = quote_etag(hashlib.md5(response.content).hexdigest())
+    response['ETag'] = etag
+    return get_conditional_response(request, etag=etag, response=response)
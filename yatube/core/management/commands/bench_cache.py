@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    override_settings, setup_databases, teardown_databases,
+)
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+BACKENDS = {
+    'locmem': lambda directory: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sqlite': lambda directory: {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(directory, 'cache.sqlite3'),
+    },
+    'file': lambda directory: {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(directory, 'files'),
+    },
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run_worker(urls, requests, seed):
+    connections.close_all()
+    client = Client()
+    counter = QueryCounter()
+    rng = random.Random(seed)
+    hits = 0
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        for _ in range(requests):
+            before = counter.count
+            client.get(rng.choice(urls))
+            hits += counter.count == before
+    return hits, requests, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает долю попаданий в кэш страниц лент при нескольких '
+        'процессах для разных бэкендов кэша.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--authors', type=int, default=50)
+        parser.add_argument(
+            '--backends', nargs='+', default=list(BACKENDS),
+            choices=list(BACKENDS),
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            test_name = os.path.join(directory, 'bench.sqlite3')
+            connection.settings_dict['TEST']['NAME'] = test_name
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                urls = self.seed(options['authors'])
+                for name in options['backends']:
+                    self.bench(name, BACKENDS[name](directory), urls, options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+    def seed(self, authors):
+        users = [
+            User.objects.create_user(username=f'bench_author_{i}')
+            for i in range(authors)
+        ]
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=user)
+            for user in users for i in range(3)
+        )
+        return [reverse('posts:index')] + [
+            reverse('posts:profile', kwargs={'username': user.username})
+            for user in users
+        ]
+
+    def bench(self, name, backend, urls, options):
+        with override_settings(CACHES={**settings.CACHES, 'default': backend}):
+            cache.clear()
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(options['workers']) as pool:
+                results = pool.starmap(run_worker, [
+                    (urls, options['requests'], seed)
+                    for seed in range(options['workers'])
+                ])
+        hits = sum(result[0] for result in results)
+        total = sum(result[1] for result in results)
+        elapsed = max(result[2] for result in results)
+        self.stdout.write(
+            f'{name:>8}: попаданий {hits}/{total} ({hits / total:.1%}), '
+            f'{total / elapsed:.0f} запросов/с'
+        )
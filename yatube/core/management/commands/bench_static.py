@@ -0,0 +1,124 @@
+import os
+import re
+import tempfile
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    override_settings, setup_databases, teardown_databases,
+)
+from django.urls import reverse
+
+from core.storage import brotli
+
+PAGES = {
+    'index': lambda: reverse('posts:index'),
+    'login': lambda: reverse('users:login'),
+    'admin': lambda: reverse('admin:login'),
+}
+ENCODINGS = {
+    'без сжатия': 'identity',
+    'gzip': 'gzip',
+    'br': 'br, gzip',
+}
+ASSET = re.compile(r'(?:src|href)="([^"]+)"')
+CSS_URL = re.compile(
+    r'''url\(\s*['"]?([^'")]+)['"]?\s*\)|@import\s+['"]([^'"]+)['"]'''
+)
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает байты статики, которые браузер скачивает при первой '
+        'загрузке страниц, с разным Accept-Encoding.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', nargs='+', default=list(PAGES), choices=list(PAGES),
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            test_name = os.path.join(directory, 'bench.sqlite3')
+            connection.settings_dict['TEST']['NAME'] = test_name
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                # Каталог статики проекта может быть не выгружен, тогда
+                # замеряется статика приложений (админки).
+                with override_settings(
+                    DEBUG=False,
+                    STATIC_ROOT=os.path.join(directory, 'static'),
+                    STATICFILES_DIRS=[
+                        path for path in settings.STATICFILES_DIRS
+                        if os.path.isdir(path)
+                    ],
+                ):
+                    call_command(
+                        'collectstatic', interactive=False, verbosity=0
+                    )
+                    for name in options['pages']:
+                        self.bench(name, PAGES[name]())
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+    def assets(self, client, url):
+        """Адреса статики страницы, включая картинки и импорты из CSS."""
+        found = []
+        queue = [
+            urljoin(url, link)
+            for link in ASSET.findall(body(client.get(url)).decode())
+        ]
+        while queue:
+            asset = urlsplit(queue.pop(0)).path
+            if not asset.startswith(settings.STATIC_URL) or asset in found:
+                continue
+            found.append(asset)
+            if asset.endswith('.css'):
+                css = body(client.get(asset)).decode(errors='replace')
+                queue.extend(
+                    urljoin(asset, link)
+                    for groups in CSS_URL.findall(css)
+                    for link in groups
+                    if link and not link.startswith('data:')
+                )
+        return found
+
+    def bench(self, name, url):
+        client = Client()
+        assets = self.assets(client, url)
+        html = len(body(client.get(url)))
+        totals = {}
+        cached = missing = 0
+        for label, accept in ENCODINGS.items():
+            if label == 'br' and brotli is None:
+                continue
+            totals[label] = 0
+            for asset in assets:
+                response = client.get(asset, HTTP_ACCEPT_ENCODING=accept)
+                if response.status_code != 200:
+                    missing += label == 'без сжатия'
+                    continue
+                totals[label] += len(body(response))
+                if label == 'без сжатия':
+                    cached += 'immutable' in response.get('Cache-Control', '')
+        sizes = ', '.join(
+            f'{label} {total / 1024:.1f} КБ' for label, total in totals.items()
+        )
+        self.stdout.write(
+            f'{name:>6}: HTML {html / 1024:.1f} КБ, статика '
+            f'{len(assets) - missing} файлов: {sizes}; '
+            f'повторный заход без запросов: {cached}'
+        )
+        if missing:
+            self.stdout.write(f'        не найдено файлов: {missing}')
@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import setup_databases, teardown_databases
+
+from core import tasks
+from core.models import Task
+
+
+def run_worker():
+    connections.close_all()
+    try:
+        return tasks.work(burst=True)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность очереди задач при разном '
+        'числе процессов-воркеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000)
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 2, 4],
+        )
+        parser.add_argument(
+            '--task-ms', type=float, default=5.0,
+            help='Сколько миллисекунд «работает» каждая задача.',
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            test_name = os.path.join(directory, 'bench.sqlite3')
+            connection.settings_dict['TEST']['NAME'] = test_name
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                for concurrency in options['concurrency']:
+                    self.bench(concurrency, options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+    def bench(self, concurrency, options):
+        Task.objects.all().delete()
+        for _ in range(options['tasks']):
+            tasks.enqueue(time.sleep, args=(options['task_ms'] / 1000,))
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        started = time.perf_counter()
+        with context.Pool(concurrency) as pool:
+            processed = sum(pool.starmap(run_worker, [()] * concurrency))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'воркеров {concurrency}: {processed} задач за {elapsed:.1f} с, '
+            f'{processed / elapsed:.0f} задач/с'
+        )
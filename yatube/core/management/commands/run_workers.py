@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import tasks
+
+
+def run_worker(burst, poll_interval):
+    connections.close_all()
+    tasks.stop_on_signals()
+    try:
+        tasks.work(burst=burst, poll_interval=poll_interval)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркеры очереди задач в отдельных процессах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Сколько процессов-воркеров запустить.',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Завершиться, когда очередь опустеет.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, если задач нет.',
+        )
+
+    def handle(self, *args, **options):
+        burst, poll_interval = options['burst'], options['poll_interval']
+        if options['concurrency'] <= 1:
+            tasks.stop_on_signals()
+            processed = tasks.work(burst=burst, poll_interval=poll_interval)
+            self.stdout.write(f'Выполнено задач: {processed}.')
+            return
+        # Соединение с базой не должно достаться дочерним процессам.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(
+                target=run_worker,
+                args=(burst, poll_interval),
+                name=f'worker-{number}',
+            )
+            for number in range(options['concurrency'])
+        ]
+        for worker in workers:
+            worker.start()
+
+        def stop(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    os.kill(worker.pid, signal.SIGTERM)
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for worker in workers:
+            worker.join()
+        self.stdout.write(f'Воркеры остановлены: {len(workers)}.')
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+STATES = {'on': True, 'off': False, 'default': None}
+
+
+class Command(BaseCommand):
+    help = (
+        'Включает и выключает замеры запросов (заголовок Server-Timing) '
+        'во всех процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'state', nargs='?', choices=list(STATES),
+            help='default возвращает значение настройки SERVER_TIMING.',
+        )
+
+    def handle(self, *args, **options):
+        if options['state'] is not None:
+            profiling.set_enabled(STATES[options['state']])
+        enabled = cache.get(profiling.ENABLED_KEY, settings.SERVER_TIMING)
+        self.stdout.write(
+            f'Замеры {"включены" if enabled else "выключены"}; процессы '
+            f'заметят изменение в течение '
+            f'{settings.SERVER_TIMING_CHECK_INTERVAL} с.'
+        )
@@ -0,0 +1,430 @@
+"""Метрики в формате Prometheus, общие для всех процессов сервера.
+
+Каждый процесс пишет свои значения в файл `<pid>.db` в METRICS_DIR,
+отображенный в память через mmap: запись — это сложение числа по
+известному смещению без системных вызовов. `/metrics` читает файлы
+всех процессов и складывает значения. Счетчики и гистограммы
+завершившихся процессов остаются в сумме, их gauge — нет. Новый
+процесс переносит файлы завершившихся в общий `archive.db`.
+"""
+import bisect
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from core import profiling
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INITIAL_SIZE = 64 * 1024
+HEADER = struct.Struct('I4x')
+KEY_LENGTH = struct.Struct('I')
+VALUE = struct.Struct('d')
+GAUGE_PREFIX = '["gauge"'
+ARCHIVE_FILE = 'archive.db'
+LOCK_FILE = 'metrics.lock'
+
+_files = {}
+_files_lock = threading.Lock()
+_registry = {}
+
+
+def _align(position):
+    return (position + 7) & ~7
+
+
+def _read_entries(data, used):
+    position = HEADER.size
+    while position < used:
+        length, = KEY_LENGTH.unpack_from(data, position)
+        start = position + KEY_LENGTH.size
+        key = bytes(data[start:start + length]).decode()
+        position = _align(start + length)
+        value, = VALUE.unpack_from(data, position)
+        yield key, value, position
+        position += VALUE.size
+
+
+class ValueFile:
+    """Значения одного процесса в отображенном в память файле.
+
+    Формат: заголовок с числом занятых байт, затем записи
+    `[длина ключа][ключ][выравнивание до 8][double]`. Пишет в файл
+    только процесс-владелец, поэтому межпроцессные блокировки не нужны.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        descriptor = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(descriptor).st_size
+            if size < INITIAL_SIZE:
+                os.ftruncate(descriptor, INITIAL_SIZE)
+                size = INITIAL_SIZE
+            self.data = mmap.mmap(descriptor, size)
+        finally:
+            os.close(descriptor)
+        self.used = HEADER.unpack_from(self.data)[0] or HEADER.size
+        self.positions = {}
+        for key, _, position in _read_entries(self.data, self.used):
+            self.positions[key] = position
+            # PID переиспользован: gauge прежнего процесса не в счет.
+            if key.startswith(GAUGE_PREFIX):
+                VALUE.pack_into(self.data, position, 0.0)
+
+    def _position(self, key):
+        position = self.positions.get(key)
+        if position is not None:
+            return position
+        encoded = key.encode()
+        start = self.used + KEY_LENGTH.size
+        position = _align(start + len(encoded))
+        end = position + VALUE.size
+        if end > len(self.data):
+            self._grow(end)
+        KEY_LENGTH.pack_into(self.data, self.used, len(encoded))
+        self.data[start:start + len(encoded)] = encoded
+        VALUE.pack_into(self.data, position, 0.0)
+        # Заголовок пишется последним: читатель не увидит запись,
+        # пока она не заполнена целиком.
+        self.used = end
+        HEADER.pack_into(self.data, 0, self.used)
+        self.positions[key] = position
+        return position
+
+    def _grow(self, needed):
+        size = len(self.data)
+        while size < needed:
+            size *= 2
+        self.data.flush()
+        self.data.close()
+        descriptor = os.open(self.path, os.O_RDWR)
+        try:
+            os.ftruncate(descriptor, size)
+            self.data = mmap.mmap(descriptor, size)
+        finally:
+            os.close(descriptor)
+
+    def add(self, key, amount):
+        with self.lock:
+            position = self._position(key)
+            value, = VALUE.unpack_from(self.data, position)
+            VALUE.pack_into(self.data, position, value + amount)
+
+    def set(self, key, value):
+        with self.lock:
+            VALUE.pack_into(self.data, self._position(key), value)
+
+    def close(self):
+        self.data.flush()
+        self.data.close()
+
+
+def _value_file():
+    directory = settings.METRICS_DIR
+    key = (os.getpid(), directory)
+    value_file = _files.get(key)
+    if value_file is None:
+        # После fork дочерний процесс заводит свой файл, а не пишет
+        # в файл родителя.
+        with _files_lock:
+            value_file = _files.get(key)
+            if value_file is None:
+                os.makedirs(directory, exist_ok=True)
+                archive_dead(directory)
+                value_file = _files[key] = ValueFile(
+                    os.path.join(directory, f'{os.getpid()}.db')
+                )
+    return value_file
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.keys = {}
+        _registry[name] = self
+
+    def key(self, suffix, labels):
+        cache_key = (suffix, tuple(sorted(labels.items())))
+        key = self.keys.get(cache_key)
+        if key is None:
+            key = self.keys[cache_key] = json.dumps(
+                [self.kind, self.name + suffix, dict(cache_key[1])],
+                ensure_ascii=False,
+            )
+        return key
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        _value_file().add(self.key('_total', labels), amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        _value_file().add(self.key('', labels), amount)
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        _value_file().set(self.key('', labels), value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.label_keys = {}
+
+    def _keys(self, labels):
+        labels_key = tuple(sorted(labels.items()))
+        keys = self.label_keys.get(labels_key)
+        if keys is None:
+            keys = self.label_keys[labels_key] = (
+                [
+                    self.key('_bucket', {**labels, 'le': _format_value(bound)})
+                    for bound in self.buckets
+                ],
+                self.key('_sum', labels),
+                self.key('_count', labels),
+            )
+        return keys
+
+    def observe(self, value, **labels):
+        bucket_keys, sum_key, count_key = self._keys(labels)
+        # Хранится только бакет, куда попало значение; накопительные
+        # суммы считает render.
+        bucket = bisect.bisect_left(self.buckets, value)
+        value_file = _value_file()
+        value_file.add(bucket_keys[bucket], 1)
+        value_file.add(sum_key, value)
+        value_file.add(count_key, 1)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == int(value):
+        return f'{int(value)}.0' if abs(value) < 1e15 else repr(value)
+    return repr(value)
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def _locked(directory, exclusive=False):
+    # fcntl нет на Windows; там файлы читаются без блокировки.
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, LOCK_FILE), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def _process_files(directory):
+    for filename in os.listdir(directory):
+        pid, extension = os.path.splitext(filename)
+        if extension == '.db' and pid.isdigit():
+            yield int(pid), os.path.join(directory, filename)
+
+
+def _read_file(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        return
+    used, = HEADER.unpack_from(data)
+    for key, value, _ in _read_entries(data, min(used, len(data))):
+        yield key, value
+
+
+def archive_dead(directory):
+    """Переносит значения завершившихся процессов в `archive.db`.
+
+    Без этого каталог копит по файлу на каждый процесс, запущенный
+    с начала работы. Gauge не переносятся: collect и так не учитывает
+    их у завершившихся процессов.
+    """
+    with _locked(directory, exclusive=True):
+        dead = [
+            path for pid, path in _process_files(directory)
+            if pid != os.getpid() and not _is_alive(pid)
+        ]
+        if not dead:
+            return
+        archive = ValueFile(os.path.join(directory, ARCHIVE_FILE))
+        try:
+            for path in dead:
+                for key, value in _read_file(path):
+                    if not key.startswith(GAUGE_PREFIX):
+                        archive.add(key, value)
+                archive.data.flush()
+                os.remove(path)
+        finally:
+            archive.close()
+
+
+def collect():
+    """Суммирует значения из файлов всех процессов и архива."""
+    totals = defaultdict(float)
+    directory = settings.METRICS_DIR
+    if not os.path.isdir(directory):
+        return totals
+    with _locked(directory):
+        for pid, path in _process_files(directory):
+            alive = None
+            for key, value in _read_file(path):
+                if key.startswith(GAUGE_PREFIX):
+                    if alive is None:
+                        alive = _is_alive(pid)
+                    if not alive:
+                        continue
+                totals[key] += value
+        archive = os.path.join(directory, ARCHIVE_FILE)
+        if os.path.exists(archive):
+            for key, value in _read_file(archive):
+                totals[key] += value
+    return totals
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    # le по соглашению идет последним.
+    return '{' + ','.join(
+        f'{name}="{_escape(labels[name])}"'
+        for name in sorted(labels, key=lambda name: (name == 'le', name))
+    ) + '}'
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _histogram_lines(metric, samples):
+    name = metric.name
+    buckets = defaultdict(float)
+    for labels, value in samples.get(name + '_bucket', ()):
+        le = labels.pop('le')
+        buckets[_labels_key(labels), le] += value
+    sums = {
+        _labels_key(labels): value
+        for labels, value in samples.get(name + '_sum', ())
+    }
+    for labels, count in sorted(
+        samples.get(name + '_count', ()),
+        key=lambda sample: _labels_key(sample[0]),
+    ):
+        key = _labels_key(labels)
+        total = 0
+        for bound in metric.buckets:
+            le = _format_value(bound)
+            total += buckets[key, le]
+            yield (
+                f'{name}_bucket{_format_labels({**labels, "le": le})} '
+                f'{_format_value(total)}'
+            )
+        yield (
+            f'{name}_sum{_format_labels(labels)} '
+            f'{_format_value(sums.get(key, 0))}'
+        )
+        yield f'{name}_count{_format_labels(labels)} {_format_value(count)}'
+
+
+def render():
+    """Текст для Prometheus (формат exposition 0.0.4)."""
+    samples = defaultdict(list)
+    for key, value in collect().items():
+        _, name, labels = json.loads(key)
+        samples[name].append((labels, value))
+    lines = []
+    for name in sorted(_registry):
+        metric = _registry[name]
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        if metric.kind == 'histogram':
+            lines.extend(_histogram_lines(metric, samples))
+            continue
+        suffix = '_total' if metric.kind == 'counter' else ''
+        lines.extend(
+            f'{name}{suffix}{_format_labels(labels)} {_format_value(value)}'
+            for labels, value in sorted(
+                samples.get(name + suffix, ()),
+                key=lambda sample: _labels_key(sample[0]),
+            )
+        )
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_LATENCY = Histogram(
+    'yatube_http_request_duration_seconds',
+    'Время ответа по имени маршрута.',
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    'yatube_http_requests',
+    'Ответы по имени маршрута, методу и статусу.',
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'yatube_http_requests_in_progress',
+    'Запросы, которые обрабатываются прямо сейчас.',
+)
+DB_QUERIES = Histogram(
+    'yatube_db_queries_per_request',
+    'Число запросов к базе на один HTTP-запрос.',
+    (0, 1, 2, 5, 10, 20, 50, 100),
+)
+CACHE_LOOKUPS = Counter(
+    'yatube_cache_lookups',
+    'Чтения кэша: result="hit" или "miss".',
+)
+UPLOAD_SIZE = Histogram(
+    'yatube_upload_size_bytes',
+    'Размер загруженных картинок до обработки.',
+    tuple(4 ** power * 1024 for power in range(2, 9)),
+)
+
+
+@profiling.on_cache_lookup
+def count_cache_lookups(hits, misses):
+    if hits:
+        CACHE_LOOKUPS.inc(hits, result='hit')
+    if misses:
+        CACHE_LOOKUPS.inc(misses, result='miss')
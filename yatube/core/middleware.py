@@ -0,0 +1,233 @@
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import time
+from stat import S_ISREG
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connection
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from core import metrics, profiling
+from core.storage import ENCODING_SUFFIXES
+
+logger = logging.getLogger('core.profiling')
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, parameters = item.partition(';')
+        coding = coding.strip().lower()
+        quality = parameters.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding)
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """Отдает собранную статику из STATIC_ROOT без похода во вьюхи.
+
+    Если браузер принимает br или gzip и рядом с файлом лежит сжатая
+    копия, отдается она. Файлы из манифеста имеют хэш в имени и
+    кэшируются навсегда, остальные — на STATIC_MAX_AGE секунд. Файлы,
+    которых нет в STATIC_ROOT, достаются следующим обработчикам.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.hashed_names = None
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(self.prefix)
+            and settings.STATIC_ROOT
+        ):
+            response = self.serve(request, request.path_info[
+                len(self.prefix):
+            ])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def is_hashed(self, name):
+        if self.hashed_names is None:
+            self.hashed_names = set(
+                getattr(staticfiles_storage, 'hashed_files', {}).values()
+            )
+        return name in self.hashed_names
+
+    def serve(self, request, name):
+        name = posixpath.normpath(name).lstrip('/')
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+            info = os.stat(path)
+        except (SuspiciousFileOperation, OSError):
+            return None
+        if not S_ISREG(info.st_mode):
+            return None
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            info.st_mtime, info.st_size,
+        ):
+            response = HttpResponseNotModified()
+        else:
+            response = self.file_response(request, name, path)
+        response['Last-Modified'] = http_date(info.st_mtime)
+        if self.is_hashed(name):
+            patch_cache_control(
+                response, public=True, immutable=True,
+                max_age=settings.STATIC_IMMUTABLE_MAX_AGE,
+            )
+        else:
+            patch_cache_control(
+                response, public=True, max_age=settings.STATIC_MAX_AGE
+            )
+        return response
+
+    def file_response(self, request, name, path):
+        content_type = (
+            mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        )
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        compressed = False
+        for encoding, suffix in ENCODING_SUFFIXES.items():
+            candidate = f'{path}.{suffix}'
+            if not os.path.exists(candidate):
+                continue
+            compressed = True
+            if encoding in accepted:
+                response = FileResponse(
+                    open(candidate, 'rb'), content_type=content_type
+                )
+                response['Content-Encoding'] = encoding
+                break
+        else:
+            response = FileResponse(
+                open(path, 'rb'), content_type=content_type
+            )
+        if compressed:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class ServerTimingMiddleware:
+    """Замеряет запрос и отдает итоги в заголовке Server-Timing.
+
+    Считаются запросы к базе и их время, рендер шаблонов, попадания
+    в кэш и построение миниатюр. Итог пишется в лог одной строкой JSON
+    вместе с повторяющимися запросами и местом, откуда они пришли.
+    Пока замеры выключены (см. core.profiling), запрос проходит без
+    оберток.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        profiling.install()
+
+    def __call__(self, request):
+        if not profiling.is_enabled():
+            return self.get_response(request)
+        profiling.instrument_cache(caches['default'])
+        with profiling.recording() as recorder:
+            with connection.execute_wrapper(recorder.query):
+                response = self.get_response(request)
+            total = recorder.total()
+        response['Server-Timing'] = self.header(recorder, total)
+        logger.info(json.dumps(
+            self.summary(request, response, recorder, total),
+            ensure_ascii=False,
+        ))
+        return response
+
+    def header(self, recorder, total):
+        metrics = [
+            f'db;dur={recorder.timings["db"] * 1000:.1f};'
+            f'desc="{len(recorder.queries)} queries"',
+            f'cache;desc="{recorder.cache_hits} hits, '
+            f'{recorder.cache_misses} misses"',
+        ]
+        metrics.extend(
+            f'{name};dur={recorder.timings[name] * 1000:.1f}'
+            for name in ('template', 'thumbnail')
+            if name in recorder.timings
+        )
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+    def summary(self, request, response, recorder, total):
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(recorder.timings['db'] * 1000, 2),
+            'db_queries': len(recorder.queries),
+            'template_ms': round(recorder.timings['template'] * 1000, 2),
+            'thumbnail_ms': round(recorder.timings['thumbnail'] * 1000, 2),
+            'cache_hits': recorder.cache_hits,
+            'cache_misses': recorder.cache_misses,
+            'duplicate_queries': recorder.duplicates(),
+        }
+
+
+class MetricsMiddleware:
+    """Собирает метрики запросов для `/metrics`.
+
+    Время ответа и число запросов к базе группируются по имени
+    маршрута, чтобы метрики не разрастались от id и slug в адресах.
+    """
+
+    methods = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        profiling.instrument_cache(caches['default'])
+
+    def __call__(self, request):
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        metrics.REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                response = self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_PROGRESS.dec()
+        elapsed = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None else 'unresolved'
+        metrics.REQUEST_LATENCY.observe(elapsed, view=view)
+        metrics.DB_QUERIES.observe(queries, view=view)
+        metrics.REQUESTS.inc(
+            view=view,
+            method=request.method if request.method in self.methods
+            else 'other',
+            status=response.status_code,
+        )
+        return response
@@ -9,3 +9,43 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Task(CreatedModel):
+    name = models.CharField('Функция', max_length=255)
+    arguments = models.TextField('Аргументы', default='{}')
+    priority = models.SmallIntegerField(
+        'Приоритет',
+        default=0,
+        help_text='Задачи с большим приоритетом выполняются раньше',
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=3
+    )
+    available_at = models.DateTimeField(
+        'Доступна с',
+        null=True,
+        help_text='Пусто, если все попытки исчерпаны',
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    lease = models.CharField(
+        'Захват',
+        max_length=32,
+        blank=True,
+        db_index=True,
+        help_text='Метка воркера, который последним взял задачу',
+    )
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = (
+            models.Index(
+                fields=('-priority', 'available_at'),
+                name='task_queue_idx',
+            ),
+        )
+
+    def __str__(self):
+        return self.name
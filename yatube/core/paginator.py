@@ -0,0 +1,173 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection, transaction
+from django.utils.functional import cached_property
+
+
+class KeysetPaginator(Paginator):
+    """Постраничный вывод по ключу сортировки без OFFSET и COUNT(*).
+
+    Страница выбирается по непрозрачному курсору `after`/`before`,
+    в котором закодированы значения двух полей ключа (по умолчанию
+    `pub_date` и `id`) крайнего объекта соседней страницы.
+    """
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-id'), **kwargs):
+        self.ordering = tuple(ordering)
+        self.keys = tuple(field.lstrip('-') for field in self.ordering)
+        self.descending = self.ordering[0].startswith('-')
+        super().__init__(
+            object_list.order_by(*self.ordering), per_page, **kwargs
+        )
+
+    def get_page(self, after=None, before=None):
+        if before:
+            values = self.decode_cursor(before)
+            if values is not None:
+                return self._seek(values, forward=False)
+        values = self.decode_cursor(after) if after else None
+        return self._seek(values, forward=True)
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, key) for key in self.keys]
+        values = [
+            value.isoformat() if isinstance(value, datetime.datetime)
+            else value
+            for value in values
+        ]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw.decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            return None
+        try:
+            values = [
+                self._key_field(key).to_python(value)
+                for key, value in zip(self.keys, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            return None
+        # Курсор подписи не имеет: подделанный, но разобранный курсор
+        # ведет на первую страницу, а не в ошибку сервера.
+        if None in values:
+            return None
+        return values
+
+    def _key_field(self, key):
+        annotation = self.object_list.query.annotations.get(key)
+        if annotation is not None:
+            return annotation.output_field
+        return self.object_list.model._meta.get_field(key)
+
+    def _seek(self, values, forward):
+        queryset = self.object_list
+        if not forward:
+            queryset = queryset.reverse()
+        if values is not None:
+            first, second = self.keys
+            lookup = 'lte' if self.descending == forward else 'gte'
+            strict = 'gte' if lookup == 'lte' else 'lte'
+            # Условие записано как диапазон по первому ключу, чтобы
+            # база шла по индексу, а не разворачивала OR в полный скан.
+            queryset = queryset.filter(
+                **{f'{first}__{lookup}': values[0]}
+            ).exclude(**{
+                first: values[0],
+                f'{second}__{strict}': values[1],
+            })
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if forward:
+            has_previous, has_next = values is not None, has_more
+        else:
+            object_list.reverse()
+            has_previous, has_next = has_more, True
+        number = 2 if has_previous else 1
+        # Номера страниц условные: их хватает, чтобы has_next() и
+        # has_previous() работали без подсчета всех записей.
+        self.num_pages = number + 1 if has_next else number
+        page = self._get_page(object_list, number, self)
+        page.next_cursor = (
+            self.encode_cursor(object_list[-1])
+            if has_next and object_list else None
+        )
+        page.previous_cursor = (
+            self.encode_cursor(object_list[0])
+            if has_previous and object_list else None
+        )
+        return page
+
+
+def estimate_count(model):
+    """Примерное число строк в таблице без полного COUNT(*).
+
+    Берет статистику, собранную ANALYZE, а без нее — наибольший rowid,
+    который SQLite находит по первичному ключу за один шаг.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        try:
+            with transaction.atomic():
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                    (model._meta.db_table,),
+                )
+                row = cursor.fetchone()
+        except DatabaseError:
+            row = None
+        if row:
+            return int(row[0].split()[0])
+        cursor.execute(f'SELECT MAX(rowid) FROM {table}')
+        return cursor.fetchone()[0] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Постраничный вывод для больших таблиц в админке.
+
+    Для всей таблицы показывает оценку числа строк, а отфильтрованную
+    выборку считает не дальше `count_limit` записей. Какое число
+    показывать пользователю, говорит `display_count`: «≈N» для оценки
+    и «N+», если подсчет остановился на пределе.
+    """
+
+    count_limit = 10000
+
+    @cached_property
+    def estimated(self):
+        return not self.object_list.query.where
+
+    @cached_property
+    def _limited_count(self):
+        # Лишняя строка отличает ровно count_limit записей от большего.
+        return self.object_list.order_by()[:self.count_limit + 1].count()
+
+    @cached_property
+    def count(self):
+        if self.estimated:
+            return estimate_count(self.object_list.model)
+        return min(self._limited_count, self.count_limit)
+
+    @property
+    def truncated(self):
+        return not self.estimated and self._limited_count > self.count_limit
+
+    @property
+    def display_count(self):
+        if self.estimated:
+            return f'≈{self.count}'
+        if self.truncated:
+            return f'{self.count_limit}+'
+        return str(self.count)
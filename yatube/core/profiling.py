@@ -0,0 +1,206 @@
+"""Замеры одного запроса: SQL, шаблоны, кэш и миниатюры.
+
+Пока замер выключен, обертки сводятся к проверке `current()` на None.
+Включается он настройкой SERVER_TIMING или на лету командой
+`server_timing on`; флаг хранится в кэше и перечитывается процессом
+не чаще раза в SERVER_TIMING_CHECK_INTERVAL секунд.
+"""
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.base import Node, Template
+
+ENABLED_KEY = 'server-timing:enabled'
+
+_local = threading.local()
+_missing = object()
+_patched_caches = set()
+_cache_listeners = []
+_flag = {'enabled': None, 'checked_at': 0.0}
+
+
+class Recorder:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = defaultdict(float)
+        self.queries = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_depth = 0
+
+    def add(self, name, seconds):
+        self.timings[name] += seconds
+
+    def query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.add('db', duration)
+            self.queries.append((sql, duration, _caller()))
+
+    def duplicates(self):
+        """Запросы с одинаковым SQL, выполненные несколько раз."""
+        groups = defaultdict(list)
+        for sql, _, location in self.queries:
+            groups[sql].append(location)
+        return [
+            {
+                'sql': sql,
+                'count': len(locations),
+                'locations': sorted(set(filter(None, locations))),
+            }
+            for sql, locations in groups.items()
+            if len(locations) >= settings.SERVER_TIMING_DUPLICATE_THRESHOLD
+        ]
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    return getattr(_local, 'recorder', None)
+
+
+@contextmanager
+def recording():
+    recorder = _local.recorder = Recorder()
+    try:
+        yield recorder
+    finally:
+        _local.recorder = None
+
+
+@contextmanager
+def measure(name):
+    recorder = current()
+    if recorder is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, time.perf_counter() - started)
+
+
+def is_enabled():
+    now = time.monotonic()
+    interval = settings.SERVER_TIMING_CHECK_INTERVAL
+    if _flag['enabled'] is None or now - _flag['checked_at'] >= interval:
+        _flag['enabled'] = cache.get(ENABLED_KEY, settings.SERVER_TIMING)
+        _flag['checked_at'] = now
+    return _flag['enabled']
+
+
+def set_enabled(enabled):
+    """Включает или выключает замеры; None возвращает SERVER_TIMING."""
+    if enabled is None:
+        cache.delete(ENABLED_KEY)
+    else:
+        cache.set(ENABLED_KEY, enabled, None)
+    _flag['enabled'] = None
+
+
+def _caller():
+    """Строка шаблона или кода проекта, откуда пришел запрос к базе."""
+    frame = sys._getframe(2)
+    code_location = None
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if isinstance(node, Node) and getattr(node, 'token', None):
+            return f'{node.origin.template_name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if code_location is None and filename.startswith(
+            settings.BASE_DIR + os.sep
+        ) and filename != __file__:
+            code_location = (
+                f'{os.path.relpath(filename, settings.BASE_DIR)}:'
+                f'{frame.f_lineno}'
+            )
+        frame = frame.f_back
+    return code_location
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        recorder = current()
+        if recorder is None:
+            return render(self, context)
+        # Вложенные include не должны учитываться дважды.
+        recorder.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            recorder.template_depth -= 1
+            if not recorder.template_depth:
+                recorder.add('template', time.perf_counter() - started)
+    return wrapper
+
+
+def on_cache_lookup(func):
+    """Регистрирует `func(hits, misses)`, вызываемую на каждое чтение кэша.
+
+    Чтения считаются только у бэкендов, переданных в instrument_cache.
+    """
+    _cache_listeners.append(func)
+    return func
+
+
+def _count_cache(hits, misses):
+    recorder = current()
+    if recorder is not None:
+        recorder.cache_hits += hits
+        recorder.cache_misses += misses
+    for listener in _cache_listeners:
+        listener(hits, misses)
+
+
+def _counted_get(get):
+    def wrapper(self, key, default=None, version=None):
+        if getattr(_local, 'in_get_many', False):
+            return get(self, key, default, version)
+        value = get(self, key, _missing, version)
+        if value is _missing:
+            _count_cache(0, 1)
+            return default
+        _count_cache(1, 0)
+        return value
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    def wrapper(self, keys, version=None):
+        keys = list(keys)
+        # get_many по умолчанию вызывает get для каждого ключа.
+        _local.in_get_many = True
+        try:
+            found = get_many(self, keys, version)
+        finally:
+            _local.in_get_many = False
+        _count_cache(len(found), len(keys) - len(found))
+        return found
+    return wrapper
+
+
+def install():
+    if not getattr(Template.render, 'profiled', False):
+        Template.render = _timed_render(Template.render)
+        Template.render.profiled = True
+
+
+def instrument_cache(backend):
+    backend_class = type(backend)
+    if backend_class in _patched_caches:
+        return
+    backend_class.get = _counted_get(backend_class.get)
+    backend_class.get_many = _counted_get_many(backend_class.get_many)
+    _patched_caches.add(backend_class)
@@ -0,0 +1,30 @@
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+@contextmanager
+def temporary_metrics_dir():
+    """METRICS_DIR во временном каталоге, который удаляется после."""
+    directory = tempfile.mkdtemp(prefix='yatube-metrics-')
+    try:
+        with override_settings(METRICS_DIR=directory):
+            yield directory
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    """Не дает запросам из тестов писать в метрики работающего сервера."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.metrics_dir = temporary_metrics_dir()
+        self.metrics_dir.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self.metrics_dir.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import os
+import tempfile
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml',
+    '.ico', '.ttf', '.otf', '.eot',
+)
+ENCODING_SUFFIXES = {'br': 'br', 'gzip': 'gz'}
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, где имя файла — SHA-256 его содержимого.
+
+    Файл `posts/photo.jpg` сохраняется как `posts/ab/cd/abcd….jpg`:
+    одинаковые загрузки попадают в один файл, а подбирать свободное
+    имя не нужно. Две первые пары символов хэша дробят каталог, чтобы
+    в нем не скапливались сотни тысяч файлов.
+
+    Если задан `retain`, он получает имя файла раньше, чем проверяется,
+    есть ли уже такой файл: взятая ссылка не дает сборщику мусора
+    удалить файл, который загрузка решила не перезаписывать.
+    """
+
+    retain = None
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def hashed_name(self, name, digest):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            directory, digest[:2], digest[2:4], digest + extension
+        )
+
+    def _save(self, name, content):
+        # Содержимое пишется во временный файл рядом с целевым и
+        # одновременно хэшируется, так что загрузка читается один раз.
+        directory = self.path(os.path.dirname(name))
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        descriptor, temporary = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    file.write(chunk)
+            name = self.hashed_name(name, digest.hexdigest())
+            if self.retain is not None:
+                self.retain(name)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                return name
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            # mkstemp создает файл с правами 0600, веб-сервер его не прочтет.
+            os.chmod(temporary, self.file_permissions_mode or 0o644)
+            os.replace(temporary, full_path)
+            temporary = None
+        finally:
+            if temporary is not None:
+                os.remove(temporary)
+        return name
+
+
+def _compress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хэшем в имени и заранее сжатыми копиями рядом.
+
+    После `collectstatic` у каждого текстового файла из манифеста
+    появляются `.gz` и, если установлен пакет brotli, `.br`; их отдает
+    core.middleware.StaticFilesMiddleware. Копия не пишется, если
+    сжатие не дало выигрыша.
+    """
+
+    def encodings(self):
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def stored_name(self, name):
+        # До collectstatic манифеста нет: ссылки ведут на файлы без
+        # хэша, как с обычным StaticFilesStorage.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        for name in set(self.hashed_files.values()):
+            if name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        for encoding in self.encodings():
+            target = f'{path}.{ENCODING_SUFFIXES[encoding]}'
+            # Имя с хэшем не меняет содержимого: готовую копию не
+            # пересжимаем при повторном collectstatic.
+            if os.path.exists(target):
+                continue
+            compressed = _compress(data, encoding)
+            if len(compressed) < len(data):
+                with open(target, 'wb') as file:
+                    file.write(compressed)
@@ -0,0 +1,132 @@
+import datetime
+import json
+import logging
+import signal
+import time
+import traceback
+import uuid
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import Task
+
+logger = logging.getLogger(__name__)
+
+_stopping = False
+
+
+def enqueue(func, args=(), kwargs=None, priority=0, delay=0,
+            max_attempts=None):
+    """Ставит вызов `func(*args, **kwargs)` в очередь задач.
+
+    Функция сохраняется по пути импорта, аргументы — в JSON. Задача
+    пишется в текущей транзакции и видна воркерам только после коммита.
+    """
+    name = func if isinstance(func, str) else (
+        f'{func.__module__}.{func.__qualname__}'
+    )
+    task = Task(
+        name=name,
+        arguments=json.dumps({'args': list(args), 'kwargs': kwargs or {}}),
+        priority=priority,
+        available_at=timezone.now() + datetime.timedelta(seconds=delay),
+    )
+    if max_attempts is not None:
+        task.max_attempts = max_attempts
+    task.save()
+    return task
+
+
+def claim():
+    """Забирает самую приоритетную доступную задачу или возвращает None.
+
+    Задача не удаляется, а скрывается от остальных воркеров на
+    TASK_VISIBILITY_TIMEOUT секунд: если воркер упадет, не закончив ее,
+    она снова станет доступна. Задача, на которой воркеры падали
+    `max_attempts` раз, больше не выдается. Выбор и захват сделаны
+    одним UPDATE, поэтому воркеры не спорят за одну строку.
+    """
+    now = timezone.now()
+    lease = uuid.uuid4().hex
+    candidates = Task.objects.filter(
+        available_at__lte=now, attempts__lt=F('max_attempts')
+    ).order_by(
+        '-priority', 'available_at', 'id'
+    ).values('pk')[:1]
+    claimed = Task.objects.filter(pk__in=candidates).update(
+        available_at=now + datetime.timedelta(
+            seconds=settings.TASK_VISIBILITY_TIMEOUT
+        ),
+        attempts=F('attempts') + 1,
+        lease=lease,
+    )
+    if not claimed:
+        return None
+    return Task.objects.get(lease=lease)
+
+
+def retry_delay(attempts):
+    return settings.TASK_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def execute(task):
+    """Выполняет задачу: удачная удаляется, неудачная откладывается.
+
+    После `max_attempts` неудачных попыток задача остается в таблице
+    с пустым `available_at`, чтобы ошибку можно было разобрать.
+    """
+    try:
+        arguments = json.loads(task.arguments)
+        import_string(task.name)(*arguments['args'], **arguments['kwargs'])
+    except Exception:
+        logger.exception('Задача %s (%s) упала', task.pk, task.name)
+        available_at = None
+        if task.attempts < task.max_attempts:
+            available_at = timezone.now() + datetime.timedelta(
+                seconds=retry_delay(task.attempts)
+            )
+        Task.objects.filter(pk=task.pk).update(
+            available_at=available_at, last_error=traceback.format_exc()
+        )
+        return False
+    Task.objects.filter(pk=task.pk).delete()
+    return True
+
+
+def run_once():
+    task = claim()
+    if task is None:
+        return False
+    execute(task)
+    return True
+
+
+def _stop(signum, frame):
+    global _stopping
+    _stopping = True
+
+
+def stop_on_signals():
+    """SIGTERM и SIGINT дают воркеру доработать текущую задачу."""
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+
+def work(burst=False, poll_interval=1.0):
+    """Цикл воркера: выполняет задачи, пока его не остановят.
+
+    С `burst` выходит, как только очередь опустела. Возвращает число
+    выполненных задач.
+    """
+    processed = 0
+    while not _stopping:
+        if run_once():
+            processed += 1
+        elif burst:
+            break
+        else:
+            time.sleep(poll_interval)
+    return processed
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+HASHED_NAME = 'posts/ab/cd/' + 'abcd' * 16 + '_320w.webp'
+PLAIN_NAME = 'posts/photo.jpg'
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_SENDFILE_BACKEND='')
+class ServeMediaTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in (HASHED_NAME, PLAIN_NAME, 'private/secret.txt'):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def get(self, name, **headers):
+        return self.client.get(settings.MEDIA_URL + name, **headers)
+
+    def test_serves_file(self):
+        response = self.get(PLAIN_NAME)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.MEDIA_MAX_AGE}',
+        )
+
+    def test_hashed_name_is_immutable(self):
+        response = self.get(HASHED_NAME)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn(
+            f'max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}',
+            response['Cache-Control'],
+        )
+
+    def test_not_modified(self):
+        response = self.get(
+            PLAIN_NAME, HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_ranges(self):
+        cases = (
+            ('bytes=0-9', 'bytes 0-9/1024', CONTENT[:10]),
+            ('bytes=1000-', 'bytes 1000-1023/1024', CONTENT[1000:]),
+            ('bytes=-4', 'bytes 1020-1023/1024', CONTENT[-4:]),
+            ('bytes=1020-5000', 'bytes 1020-1023/1024', CONTENT[1020:]),
+        )
+        for header, content_range, content in cases:
+            with self.subTest(header=header):
+                response = self.get(PLAIN_NAME, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(
+                    response['Content-Length'], str(len(content))
+                )
+                self.assertEqual(
+                    b''.join(response.streaming_content), content
+                )
+
+    def test_unsatisfiable_range(self):
+        response = self.get(PLAIN_NAME, HTTP_RANGE='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_ignored_ranges(self):
+        for headers in (
+            {'HTTP_RANGE': 'bytes=0-1,5-6'},
+            {'HTTP_RANGE': 'items=0-1'},
+            {'HTTP_RANGE': 'bytes=0-1', 'HTTP_IF_RANGE': '"etag"'},
+        ):
+            with self.subTest(headers=headers):
+                response = self.get(PLAIN_NAME, **headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    b''.join(response.streaming_content), CONTENT
+                )
+
+    def test_unauthorized_and_missing_paths(self):
+        for name in (
+            'private/secret.txt',
+            'posts/../private/secret.txt',
+            'posts/missing.jpg',
+            'posts/ab',
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name).status_code, 404)
+
+    def test_sendfile_backends(self):
+        cases = (
+            ('nginx', 'X-Accel-Redirect', '/protected-media/' + PLAIN_NAME),
+            (
+                'apache', 'X-Sendfile',
+                os.path.join(TEMP_MEDIA_ROOT, PLAIN_NAME),
+            ),
+        )
+        for backend, header, value in cases:
+            with self.subTest(backend=backend), self.settings(
+                MEDIA_SENDFILE_BACKEND=backend
+            ):
+                response = self.get(PLAIN_NAME)
+                self.assertEqual(response[header], value)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['Content-Type'], 'image/jpeg')
+                self.assertIn('Last-Modified', response)
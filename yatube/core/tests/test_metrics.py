@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import UnidentifiedImageError
+
+from core import metrics
+from posts import uploads
+
+TEMP_METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def bump_in_child():
+    metrics.REQUESTS.inc(3, view='child', method='GET', status=200)
+    metrics.REQUESTS_IN_PROGRESS.inc()
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+class MetricsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        metrics._files.clear()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Type'], 'text/plain; version=0.0.4'
+        )
+        return response.content.decode()
+
+    def test_request_metrics_by_view_name(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.client.get('/nonexist-page/')
+        text = self.scrape()
+        self.assertIn(
+            '# TYPE yatube_http_request_duration_seconds histogram', text
+        )
+        self.assertIn(
+            'yatube_http_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 2.0',
+            text,
+        )
+        self.assertIn(
+            'yatube_http_request_duration_seconds_count'
+            '{view="posts:index"} 2.0',
+            text,
+        )
+        self.assertIn(
+            'yatube_http_requests_total'
+            '{method="GET",status="404",view="unresolved"} 1.0',
+            text,
+        )
+        self.assertIn(
+            'yatube_db_queries_per_request_count{view="posts:index"} 2.0',
+            text,
+        )
+        self.assertRegex(
+            text, r'yatube_cache_lookups_total\{result="miss"\} [1-9]'
+        )
+
+    def test_buckets_are_cumulative_and_ordered(self):
+        histogram = metrics.REQUEST_LATENCY
+        for value in (0.003, 0.02, 0.02, 20):
+            histogram.observe(value, view='test')
+        lines = [
+            line for line in metrics.render().splitlines()
+            if 'view="test"' in line
+        ]
+        self.assertEqual(lines[0], (
+            'yatube_http_request_duration_seconds_bucket'
+            '{view="test",le="0.005"} 1.0'
+        ))
+        self.assertIn(
+            'yatube_http_request_duration_seconds_bucket'
+            '{view="test",le="0.025"} 3.0',
+            lines,
+        )
+        self.assertEqual(lines[-3:], [
+            'yatube_http_request_duration_seconds_bucket'
+            '{view="test",le="+Inf"} 4.0',
+            'yatube_http_request_duration_seconds_sum{view="test"} 20.043',
+            'yatube_http_request_duration_seconds_count{view="test"} 4.0',
+        ])
+
+    def test_values_summed_across_processes(self):
+        metrics.REQUESTS.inc(view='child', method='GET', status=200)
+        metrics.REQUESTS_IN_PROGRESS.set(2)
+        process = multiprocessing.get_context('fork').Process(
+            target=bump_in_child
+        )
+        process.start()
+        process.join()
+        text = metrics.render()
+        self.assertIn(
+            'yatube_http_requests_total'
+            '{method="GET",status="200",view="child"} 4.0',
+            text,
+        )
+        # gauge завершившегося процесса не учитывается.
+        self.assertIn('yatube_http_requests_in_progress 2.0', text)
+
+    def test_dead_process_files_archived(self):
+        process = multiprocessing.get_context('fork').Process(
+            target=bump_in_child
+        )
+        process.start()
+        process.join()
+        # Новый процесс при старте сводит файлы завершившихся.
+        metrics._files.clear()
+        metrics.REQUESTS.inc(view='child', method='GET', status=200)
+        self.assertEqual(
+            sorted(os.listdir(TEMP_METRICS_DIR)),
+            sorted([
+                f'{os.getpid()}.db', metrics.ARCHIVE_FILE, metrics.LOCK_FILE
+            ]),
+        )
+        text = metrics.render()
+        self.assertIn(
+            'yatube_http_requests_total'
+            '{method="GET",status="200",view="child"} 4.0',
+            text,
+        )
+        self.assertNotIn('yatube_http_requests_in_progress 1.0', text)
+
+    def test_file_grows(self):
+        for number in range(3000):
+            metrics.REQUESTS.inc(
+                view=f'view-{number}', method='GET', status=200
+            )
+        self.assertIn('view="view-2999"', metrics.render())
+
+    def test_upload_size(self):
+        upload = SimpleUploadedFile('image.png', b'not an image' * 100)
+        with self.assertRaises(UnidentifiedImageError):
+            uploads.normalize(upload)
+        self.assertIn(
+            'yatube_upload_size_bytes_bucket{le="16384.0"} 1.0',
+            metrics.render(),
+        )
+
+    def test_forbidden_for_other_addresses(self):
+        response = self.client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 403)
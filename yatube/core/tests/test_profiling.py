@@ -0,0 +1,72 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.template import Context, Origin, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+
+User = get_user_model()
+
+
+@override_settings(SERVER_TIMING=False, SERVER_TIMING_CHECK_INTERVAL=0)
+class ServerTimingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(profiling.set_enabled, None)
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_header_and_log(self):
+        profiling.set_enabled(True)
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+        header = response['Server-Timing']
+        self.assertRegex(header, r'^db;dur=[\d.]+;desc="\d+ queries", ')
+        self.assertRegex(header, r'cache;desc="\d+ hits, [1-9]\d* misses"')
+        self.assertIn('template;dur=', header)
+        self.assertRegex(header, r'total;dur=[\d.]+$')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], reverse('posts:index'))
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['template_ms'], 0)
+        profiling.set_enabled(False)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_cache_hits_and_misses(self):
+        profiling.instrument_cache(caches['default'])
+        cache.set('present', 1)
+        with profiling.recording() as recorder:
+            cache.get('present')
+            cache.get('absent', 'default')
+            cache.get_many(['present', 'absent'])
+        self.assertEqual(
+            (recorder.cache_hits, recorder.cache_misses), (2, 2)
+        )
+
+    def test_duplicate_queries_point_to_caller(self):
+        template = Template(
+            '{% for user in users %}{{ user.username }}{% endfor %}\n'
+            '{% for user in users.all %}{{ user.username }}{% endfor %}',
+            origin=Origin('feed.html', template_name='feed.html'),
+        )
+        User.objects.create_user(username='author')
+        with profiling.recording() as recorder:
+            with connection.execute_wrapper(recorder.query):
+                list(User.objects.all())
+                list(User.objects.all())
+                template.render(Context({'users': User.objects.all()}))
+        duplicate, = recorder.duplicates()
+        self.assertEqual(duplicate['count'], 4)
+        self.assertIn('feed.html:1', duplicate['locations'])
+        self.assertIn('feed.html:2', duplicate['locations'])
+        self.assertTrue(any(
+            location.startswith('core/tests/test_profiling.py:')
+            for location in duplicate['locations']
+        ))
@@ -0,0 +1,99 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+
+from core.middleware import accepted_encodings
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SOURCE_DIR = os.path.join(TEMP_DIR, 'source')
+CSS = b'body { background: url("../img/dot.png"); }\n' * 20
+
+
+@override_settings(
+    STATICFILES_DIRS=[SOURCE_DIR],
+    STATIC_ROOT=os.path.join(TEMP_DIR, 'collected'),
+    INSTALLED_APPS=[
+        app for app in settings.INSTALLED_APPS
+        if app != 'django.contrib.admin'
+    ],
+)
+class StaticFilesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name, content in (
+            ('css/site.css', CSS),
+            ('img/dot.png', b'\x89PNG' + bytes(100)),
+        ):
+            path = os.path.join(SOURCE_DIR, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(content)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_names_are_fingerprinted_and_compressed(self):
+        css_url = static('css/site.css')
+        self.assertRegex(css_url, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        name = css_url[len(settings.STATIC_URL):]
+        with open(staticfiles_storage.path(name) + '.gz', 'rb') as file:
+            content = gzip.decompress(file.read())
+        png = static('img/dot.png')[len(settings.STATIC_URL):]
+        self.assertIn(f'../{png}'.encode(), content)
+        # PNG уже сжат, копии для него нет.
+        self.assertFalse(
+            os.path.exists(staticfiles_storage.path(png) + '.gz')
+        )
+
+    def test_serves_negotiated_encoding(self):
+        url = static('css/site.css')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        compressed = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Length'], str(len(compressed)))
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        content = b''.join(plain.streaming_content)
+        self.assertEqual(gzip.decompress(compressed), content)
+        self.assertLess(len(compressed), len(content))
+
+    def test_unhashed_name_is_not_immutable(self):
+        response = self.client.get(settings.STATIC_URL + 'css/site.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.STATIC_MAX_AGE}',
+        )
+
+    def test_missing_file_falls_through(self):
+        response = self.client.get(settings.STATIC_URL + 'css/missing.css')
+        self.assertEqual(response.status_code, 404)
+
+
+class AcceptEncodingTest(TestCase):
+    def test_accepted_encodings(self):
+        cases = (
+            ('', set()),
+            ('gzip, deflate, br', {'gzip', 'deflate', 'br'}),
+            ('br;q=0, gzip;q=0.5', {'gzip'}),
+            ('GZIP ; q=1.0, identity;q=bad', {'gzip'}),
+        )
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(accepted_encodings(header), expected)
@@ -0,0 +1,98 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+calls = []
+
+
+def record(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+def fail():
+    raise ValueError('сбой')
+
+
+@override_settings(TASK_RETRY_DELAY=10, TASK_VISIBILITY_TIMEOUT=60)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        tasks.enqueue(record, args=('a',), kwargs={'suffix': '!'})
+        self.assertTrue(tasks.run_once())
+        self.assertEqual(calls, ['a!'])
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(tasks.run_once())
+
+    def test_priority_then_age(self):
+        tasks.enqueue(record, args=('low',))
+        tasks.enqueue(record, args=('high',), priority=5)
+        tasks.enqueue(record, args=('later',), priority=5)
+        tasks.enqueue(record, args=('delayed',), priority=9, delay=60)
+        self.assertEqual(tasks.work(burst=True), 3)
+        self.assertEqual(calls, ['high', 'later', 'low'])
+
+    def test_claimed_task_hidden_until_timeout(self):
+        task = tasks.enqueue(record, args=('a',))
+        claimed = tasks.claim()
+        self.assertEqual(claimed.pk, task.pk)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(tasks.claim())
+        Task.objects.filter(pk=task.pk).update(
+            available_at=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        self.assertEqual(tasks.claim().attempts, 2)
+
+    def test_crashing_task_not_claimed_after_max_attempts(self):
+        task = tasks.enqueue(record, args=('a',), max_attempts=2)
+        for attempt in (1, 2):
+            # Воркер взял задачу и упал, не вызвав execute.
+            self.assertEqual(tasks.claim().attempts, attempt)
+            Task.objects.filter(pk=task.pk).update(
+                available_at=timezone.now() - datetime.timedelta(seconds=1)
+            )
+        self.assertIsNone(tasks.claim())
+        self.assertFalse(tasks.run_once())
+        self.assertEqual(calls, [])
+
+    def test_retry_with_backoff_then_give_up(self):
+        task = tasks.enqueue(fail, max_attempts=2)
+        with self.assertLogs(tasks.logger, 'ERROR'):
+            self.assertTrue(tasks.run_once())
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, 1)
+        self.assertIn('сбой', task.last_error)
+        delay = task.available_at - timezone.now()
+        self.assertGreater(delay, datetime.timedelta(seconds=8))
+        self.assertIsNone(tasks.claim())
+        Task.objects.filter(pk=task.pk).update(available_at=timezone.now())
+        with self.assertLogs(tasks.logger, 'ERROR'):
+            self.assertTrue(tasks.run_once())
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, 2)
+        self.assertIsNone(task.available_at)
+
+    def test_backoff_doubles(self):
+        self.assertEqual(
+            [tasks.retry_delay(attempt) for attempt in (1, 2, 3)],
+            [10, 20, 40],
+        )
+
+    def test_run_workers_burst(self):
+        tasks.enqueue(record, args=('a',))
+        tasks.enqueue('core.tests.test_tasks.record', args=('b',))
+        out = StringIO()
+        with mock.patch.object(tasks, 'stop_on_signals'):
+            call_command(
+                'run_workers', concurrency=1, burst=True, stdout=out
+            )
+        self.assertEqual(calls, ['a', 'b'])
+        self.assertIn('2', out.getvalue())
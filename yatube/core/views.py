@@ -1,4 +1,29 @@
+import mimetypes
+import os
+import posixpath
+import re
+from stat import S_ISREG
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden,
+    HttpResponseNotModified,
+)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from core import metrics
+
+# Имена картинок постов — SHA-256 содержимого (с суффиксом ширины
+# у вариантов), миниатюры sorl — md5 ключа: по такому адресу всегда
+# лежит один и тот же файл.
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{32}([0-9a-f]{32})?(_\d+w)?\.\w+$')
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
 
 
 def page_not_found(request, exception):
@@ -7,3 +32,155 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+class FileRange:
+    """Читает из файла только байты [start, end]."""
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Возвращает (start, end) из заголовка Range, None или False.
+
+    Поддерживается один диапазон: на несколько диапазонов и на
+    некорректный заголовок возвращается None, и файл отдается целиком.
+    False означает, что диапазон лежит за концом файла.
+    """
+    match = BYTE_RANGE.match(header.replace(' ', ''))
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        if not int(last) or not size:
+            return False
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = size - 1
+    if last:
+        if int(last) < start:
+            return None
+        end = min(int(last), end)
+    if start >= size:
+        return False
+    return start, end
+
+
+def authorize_media(request, path):
+    """Разрешены только публичные каталоги; скрытые файлы не отдаются."""
+    return path.startswith(settings.MEDIA_PUBLIC_DIRS) and not any(
+        part.startswith('.') for part in path.split('/')
+    )
+
+
+def content_type(full_path):
+    return mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+
+def sendfile_response(path, full_path):
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    # Тело подставит веб-сервер, он же обработает Range.
+    response = HttpResponse(content_type=content_type(full_path))
+    if backend == 'nginx':
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+        )
+    elif backend == 'apache':
+        response['X-Sendfile'] = full_path
+    else:
+        return None
+    return response
+
+
+def file_response(request, full_path, info):
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if 'HTTP_RANGE' in request.META and (
+        if_range is None or if_range == http_date(info.st_mtime)
+    ):
+        byte_range = parse_range(request.META['HTTP_RANGE'], info.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{info.st_size}'
+        return response
+    if byte_range is None:
+        # Без диапазона файл уходит в wsgi.file_wrapper как есть, и
+        # сервер приложений может отдать его через sendfile().
+        response = FileResponse(
+            open(full_path, 'rb'), content_type=content_type(full_path)
+        )
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(open(full_path, 'rb'), start, end),
+            content_type=content_type(full_path),
+            status=206,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{info.st_size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Отдает файл из MEDIA_ROOT после проверки доступа.
+
+    С MEDIA_SENDFILE_BACKEND передачу берет на себя веб-сервер через
+    X-Accel-Redirect (nginx) или X-Sendfile (Apache); иначе файл
+    отдается FileResponse с поддержкой Range. Адреса с хэшем в имени
+    кэшируются навсегда, остальные — на MEDIA_MAX_AGE секунд.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    if not authorize_media(request, path):
+        raise Http404
+    full_path = safe_join(settings.MEDIA_ROOT, path)
+    try:
+        info = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not S_ISREG(info.st_mode):
+        raise Http404
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        info.st_mtime, info.st_size,
+    ):
+        response = HttpResponseNotModified()
+    else:
+        response = sendfile_response(path, full_path) or file_response(
+            request, full_path, info
+        )
+    response['Last-Modified'] = http_date(info.st_mtime)
+    if HASHED_NAME.search(path):
+        patch_cache_control(
+            response, public=True, immutable=True,
+            max_age=settings.MEDIA_IMMUTABLE_MAX_AGE,
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.MEDIA_MAX_AGE
+        )
+    return response
+
+
+@require_safe
+def metrics_view(request):
+    """Метрики всех процессов в текстовом формате Prometheus."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4'
+    )
@@ -1,16 +1,143 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.cache import cache
+from django.utils import timezone
 
+from core.paginator import EstimatedCountPaginator
+from posts import bulk, page_cache, search
 from posts.models import Group, Post
 
+GROUP_CHOICES_KEY = 'posts:admin:group_choices:{}'
+GROUP_CHOICES_TIMEOUT = 60 * 60
+YEARS_KEY = 'posts:admin:years'
+YEARS_TIMEOUT = 60 * 60
+SEARCH_MIN_LENGTH = 3
+
+
+def group_choices(field):
+    """Варианты групп для редактируемой колонки, общие для всех строк.
+
+    Без этого каждая строка списка отдельно запрашивает группы
+    для своего выпадающего списка.
+    """
+    generation, = page_cache.get_generations(['groups'])
+    key = GROUP_CHOICES_KEY.format(generation)
+    choices = cache.get(key)
+    if choices is None:
+        choices = list(field.choices)
+        cache.set(key, choices, GROUP_CHOICES_TIMEOUT)
+    return choices
+
+
+def post_years():
+    """Годы публикации постов, от новых к старым.
+
+    Границы берутся из первого и последнего поста по индексу даты
+    и кэшируются на час, а не считаются через DISTINCT по всем датам,
+    как у date_hierarchy. Новый год появится в списке с задержкой
+    до часа.
+    """
+    years = cache.get(YEARS_KEY)
+    if years is None:
+        dates = Post.objects.values_list('pub_date', flat=True)
+        first = dates.order_by('pub_date').first()
+        last = dates.order_by('-pub_date').first()
+        years = [] if first is None else list(range(
+            timezone.localtime(last).year,
+            timezone.localtime(first).year - 1,
+            -1,
+        ))
+        cache.set(YEARS_KEY, years, YEARS_TIMEOUT)
+    return years
+
+
+class PubYearFilter(admin.SimpleListFilter):
+    title = 'год публикации'
+    parameter_name = 'year'
+
+    def lookups(self, request, model_admin):
+        return [(str(year), str(year)) for year in post_years()]
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(pub_date__year=int(self.value()))
+        return queryset
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        empty_label='-пусто-',
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'].choices = group_choices(self.fields['group'])
+
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
-
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_editable = ('group',)
-    list_filter = ('pub_date',)
+    list_filter = (PubYearFilter, 'pub_date')
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = PostActionForm
+    actions = ('reassign_group', 'delete_posts')
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group' and field is not None:
+            field.choices = group_choices(field)
+        return field
+
+    def get_search_results(self, request, queryset, search_term):
+        words = search.WORD_RE.findall(search_term)
+        if not words:
+            return queryset, False
+        if min(map(len, words)) < SEARCH_MIN_LENGTH:
+            # Короткое слово ищется как префикс и совпадает почти
+            # со всеми постами.
+            self.message_user(
+                request,
+                f'Каждое слово запроса должно быть не короче '
+                f'{SEARCH_MIN_LENGTH} символов.',
+                messages.WARNING,
+            )
+            return queryset.none(), False
+        matching = search.search(search_term).values('pk')
+        return queryset.filter(pk__in=matching), False
+
+    def reassign_group(self, request, queryset):
+        group = None
+        group_id = request.POST.get('group')
+        if group_id:
+            group = Group.objects.filter(pk=group_id).first()
+        updated = bulk.reassign_group(queryset, group)
+        self.message_user(
+            request, f'Группа изменена у постов: {updated}.', messages.SUCCESS
+        )
+
+    reassign_group.short_description = 'Перенести в выбранную группу'
+
+    def delete_posts(self, request, queryset):
+        deleted = bulk.delete_posts(queryset)
+        self.message_user(
+            request, f'Удалено постов: {deleted}.', messages.SUCCESS
+        )
+
+    delete_posts.short_description = 'Удалить выбранные посты'
 
 
 @admin.register(Group)
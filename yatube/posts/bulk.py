@@ -0,0 +1,51 @@
+"""Массовые операции над постами одним запросом на таблицу.
+
+Сигналы моделей при этом не срабатывают, поэтому счетчики, ленты
+и кэш страниц обновляются здесь явно.
+"""
+from django.db import transaction
+
+from posts import counters, images, page_cache
+from posts.models import Comment, Group, Post, TimelineEntry, User
+
+
+def _scopes(posts, group_ids=()):
+    usernames = User.objects.filter(
+        pk__in=posts.values('author_id')
+    ).values_list('username', flat=True)
+    slugs = Group.objects.filter(
+        pk__in=[*group_ids, *posts.values_list('group_id', flat=True)]
+    ).values_list('slug', flat=True)
+    return [
+        'index',
+        *(f'author:{username}' for username in usernames),
+        *(f'group:{slug}' for slug in slugs),
+    ]
+
+
+@transaction.atomic
+def reassign_group(posts, group):
+    posts = Post.objects.filter(pk__in=posts.values('pk'))
+    scopes = _scopes(posts, [group.pk] if group else [])
+    updated = posts.update(group=group)
+    page_cache.bump(*scopes)
+    return updated
+
+
+@transaction.atomic
+def delete_posts(posts):
+    posts = Post.objects.filter(pk__in=posts.values('pk'))
+    scopes = _scopes(posts)
+    counters.subtract_posts(posts)
+    images.release_posts(posts)
+    # _raw_delete удаляет одним DELETE, не загружая объекты ради
+    # сигналов каскада; связанные строки удаляются так же явно.
+    for related in (
+        Comment.objects.filter(post__in=posts.values('pk')),
+        TimelineEntry.objects.filter(post__in=posts.values('pk')),
+    ):
+        related._raw_delete(related.db)
+    deleted = posts._raw_delete(posts.db)
+    page_cache.bump(*scopes)
+    transaction.on_commit(images.collect_garbage)
+    return deleted
@@ -0,0 +1,104 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from posts.models import Comment, Follow, Post, User, UserStats
+
+
+def bump_user(user_id, field, delta):
+    if user_id is None:
+        return
+    stats = UserStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        stats = stats.filter(**{f'{field}__gte': -delta})
+    if not stats.update(**{field: F(field) + delta}) and delta > 0:
+        if not UserStats.objects.filter(user_id=user_id).exists():
+            recount_user(User(pk=user_id))
+
+
+def bump_comments(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F('comment_count') + delta)
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def _user_counts(users):
+    return users.annotate(
+        posts_total=_count(Post.objects, 'author'),
+        followers_total=_count(Follow.objects, 'author'),
+        following_total=_count(Follow.objects, 'user'),
+    ).values_list(
+        'pk', 'posts_total', 'followers_total', 'following_total'
+    )
+
+
+def recount_user(user):
+    user_id, posts, followers, following = _user_counts(
+        User.objects.filter(pk=user.pk)
+    ).get()
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': posts,
+            'followers_count': followers,
+            'following_count': following,
+        },
+    )
+    return stats
+
+
+def get_stats(user):
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return recount_user(user)
+
+
+def subtract_posts(posts):
+    UserStats.objects.filter(user_id__in=posts.values('author_id')).update(
+        posts_count=Greatest(
+            F('posts_count') - _count(posts, 'author'), 0
+        )
+    )
+
+
+def recount_users(batch_size):
+    total = 0
+    users = _user_counts(User.objects.order_by('pk'))
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return total
+        with transaction.atomic():
+            UserStats.objects.filter(
+                user_id__in=[row[0] for row in batch]
+            ).delete()
+            UserStats.objects.bulk_create([
+                UserStats(
+                    user_id=user_id,
+                    posts_count=posts,
+                    followers_count=followers,
+                    following_count=following,
+                )
+                for user_id, posts, followers, following in batch
+            ])
+        total += len(batch)
+        last_pk = batch[-1][0]
+
+
+def recount_comments():
+    return Post.objects.update(comment_count=_count(Comment.objects, 'post'))
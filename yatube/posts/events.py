@@ -0,0 +1,89 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections, transaction
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+PUBLISH = 'publish'
+EDIT = 'edit'
+DELETE = 'delete'
+
+_handlers = {PUBLISH: [], EDIT: [], DELETE: []}
+_executor = None
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def handler(*events):
+    """Регистрирует `func(post)` как обработчик событий поста.
+
+    Обработчики вызываются только после коммита транзакции, в которой
+    пост сохранили или удалили, поэтому не замедляют саму запись.
+    События, возникшие в запросе, обрабатываются после отправки ответа,
+    а при POST_EVENT_WORKERS — в пуле потоков.
+    """
+    def register(func):
+        for event in events:
+            _handlers[event].append(func)
+        return func
+    return register
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POST_EVENT_WORKERS,
+                thread_name_prefix='post-events',
+            )
+        return _executor
+
+
+def _run(event, post):
+    for func in _handlers[event]:
+        try:
+            func(post)
+        except Exception:
+            logger.exception(
+                'Обработчик %s события %s поста %s упал',
+                func.__name__, event, post.pk,
+            )
+
+
+def _run_in_background(event, post):
+    try:
+        _run(event, post)
+    finally:
+        connections.close_all()
+
+
+def _dispatch(event, post):
+    if settings.POST_EVENT_WORKERS:
+        _get_executor().submit(_run_in_background, event, post)
+    elif getattr(_local, 'deferred', None) is not None:
+        _local.deferred.append((event, post))
+    else:
+        _run(event, post)
+
+
+def emit(event, post):
+    transaction.on_commit(lambda: _dispatch(event, post))
+
+
+@receiver(request_started)
+def defer_events(sender, **kwargs):
+    _local.deferred = []
+
+
+@receiver(request_finished)
+def run_deferred_events(sender, **kwargs):
+    # request_finished приходит, когда сервер уже отдал ответ клиенту.
+    deferred, _local.deferred = getattr(_local, 'deferred', None), None
+    for event, post in deferred or ():
+        _run(event, post)
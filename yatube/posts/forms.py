@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from posts import uploads
 from posts.models import Post, Comment
 
 
@@ -9,6 +11,12 @@ class PostForm(forms.ModelForm):
         fields = ('text', 'group', 'image')
         valid = True
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return uploads.normalize(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
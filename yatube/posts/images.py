@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from PIL import Image, ImageOps, features
+from sorl import thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from posts import thumbnails
+from posts.models import ImageBlob, Post, image_storage
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'avif': ('AVIF', 'image/avif', {'quality': 60}),
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {
+        'quality': 82, 'optimize': True, 'progressive': True,
+    }),
+}
+FALLBACK_FORMAT = 'jpg'
+
+
+def variant_name(name, width, extension):
+    stem, _ = os.path.splitext(name)
+    return f'{stem}_{width}w.{extension}'
+
+
+def _formats():
+    # Pillow может быть собран без AVIF или WebP; JPEG есть всегда.
+    return [
+        extension for extension in settings.IMAGE_VARIANT_FORMATS
+        if extension != FALLBACK_FORMAT and features.check(extension)
+    ] + [FALLBACK_FORMAT]
+
+
+def _encode(image, extension):
+    image_format, _, options = FORMATS[extension]
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def build_variants(name, force=False):
+    """Строит набор ширин картинки поста в современных форматах и JPEG.
+
+    Все варианты обрезаны до пропорций ленты, поэтому браузер может
+    выбрать любой из них по `srcset`. Возвращает описание набора для
+    `Post.image_variants` или пустую строку, если картинку не открыть.
+    Имя картинки — хэш содержимого, так что для повторной загрузки
+    готовый набор берется у другого поста; `force` строит его заново.
+    """
+    if not force:
+        known = Post.objects.filter(image=name).exclude(
+            image_variants=''
+        ).values_list('image_variants', flat=True).first()
+        if known:
+            return known
+    try:
+        with image_storage.open(name) as source:
+            image = Image.open(source)
+            image = ImageOps.exif_transpose(image).convert('RGB')
+    except Exception:
+        logger.exception('Не удалось открыть картинку %s', name)
+        return ''
+    ratio_width, ratio_height = settings.IMAGE_VARIANT_RATIO
+    widths = [
+        width for width in settings.IMAGE_VARIANT_WIDTHS
+        if width <= image.width
+    ] or [min(settings.IMAGE_VARIANT_WIDTHS)]
+    formats = _formats()
+    for width in widths:
+        height = round(width * ratio_height / ratio_width)
+        resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        for extension in formats:
+            target = variant_name(name, width, extension)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(target, _encode(resized, extension))
+    return json.dumps({'widths': widths, 'formats': formats})
+
+
+def build_post_images(post_id, name):
+    """Задача очереди: варианты и миниатюры картинки `name` поста.
+
+    Если картинку поста успели заменить, задача ничего не делает:
+    для новой картинки поставлена своя.
+    """
+    if not Post.objects.filter(pk=post_id, image=name).exists():
+        return
+    variants = build_variants(name) if name else ''
+    Post.objects.filter(pk=post_id, image=name).update(
+        image_variants=variants
+    )
+    if name and not variants:
+        thumbnails.build_presets(name)
+
+
+def retain(name):
+    if not ImageBlob.objects.filter(name=name).update(
+        references=F('references') + 1
+    ):
+        ImageBlob.objects.create(name=name, references=1)
+
+
+def release(name):
+    ImageBlob.objects.filter(name=name, references__gt=0).update(
+        references=F('references') - 1
+    )
+
+
+def release_posts(posts):
+    rows = posts.exclude(image='').exclude(image=None).order_by().values(
+        'image'
+    ).annotate(total=Count('pk')).values_list('image', 'total')
+    for name, total in rows:
+        ImageBlob.objects.filter(name=name).update(
+            references=Greatest(F('references') - total, 0)
+        )
+
+
+def recount_blobs():
+    """Пересчитывает ссылки на файлы картинок по таблице постов."""
+    rows = dict(
+        Post.objects.exclude(image='').exclude(image=None).order_by().values(
+            'image'
+        ).annotate(total=Count('pk')).values_list('image', 'total')
+    )
+    ImageBlob.objects.exclude(name__in=list(rows)).update(references=0)
+    for name, total in rows.items():
+        ImageBlob.objects.update_or_create(
+            name=name, defaults={'references': total}
+        )
+
+
+def delete_files(name):
+    for width in settings.IMAGE_VARIANT_WIDTHS:
+        for extension in FORMATS:
+            default_storage.delete(variant_name(name, width, extension))
+    # Миниатюры sorl привязаны к исходнику и удаляются вместе с ним.
+    thumbnail.delete(ImageFile(name, image_storage))
+
+
+def collect_garbage():
+    """Удаляет файлы картинок, на которые не ссылается ни один пост.
+
+    Строка удаляется условным DELETE раньше файла: если на картинку
+    успели сослаться снова, файл останется. Строка и файлы удаляются
+    в одной транзакции, поэтому загрузка того же файла ждет ее конца
+    в retain и затем записывает файл заново. Возвращает число
+    удаленных файлов.
+    """
+    deleted = 0
+    names = ImageBlob.objects.filter(references=0).values_list(
+        'name', flat=True
+    )
+    for name in list(names):
+        with transaction.atomic():
+            if not ImageBlob.objects.filter(
+                name=name, references=0
+            ).delete()[0]:
+                continue
+            try:
+                delete_files(name)
+            except Exception:
+                logger.exception('Не удалось удалить картинку %s', name)
+            else:
+                deleted += 1
+    return deleted
+
+
+def picture(post):
+    if not post.image or not post.image_variants:
+        return None
+    variants = json.loads(post.image_variants)
+    name = post.image.name
+
+    def srcset(extension):
+        return ', '.join(
+            f'{default_storage.url(variant_name(name, width, extension))} '
+            f'{width}w'
+            for width in variants['widths']
+        )
+
+    fallback = [
+        width for width in variants['widths']
+        if width <= settings.IMAGE_VARIANT_DEFAULT_WIDTH
+    ] or variants['widths'][:1]
+    return {
+        'sources': [
+            {'type': FORMATS[extension][1], 'srcset': srcset(extension)}
+            for extension in variants['formats']
+            if extension != FALLBACK_FORMAT
+        ],
+        'srcset': srcset(FALLBACK_FORMAT),
+        'src': default_storage.url(
+            variant_name(name, fallback[-1], FALLBACK_FORMAT)
+        ),
+        'sizes': settings.IMAGE_VARIANT_SIZES,
+    }
@@ -0,0 +1,103 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    override_settings, setup_databases, teardown_databases,
+)
+from django.urls import reverse
+from PIL import Image
+
+User = get_user_model()
+
+CASES = {
+    'jpeg-12mp': ((4000, 3000), 'JPEG', 'photo.jpg'),
+    'jpeg-40mp': ((7744, 5164), 'JPEG', 'photo.jpg'),
+    'png-12mp': ((4000, 3000), 'PNG', 'picture.png'),
+}
+# Без ограничения размеров оригинал сохраняется целиком, как до
+# появления posts.uploads.
+UNLIMITED = {
+    'IMAGE_UPLOAD_MAX_SIDE': 100_000,
+    'IMAGE_UPLOAD_MAX_PIXELS': 10 ** 10,
+}
+
+
+def upload(user, path):
+    connections.close_all()
+    client = Client()
+    client.force_login(user)
+    with open(path, 'rb') as image:
+        response = client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост из бенчмарка', 'image': image},
+        )
+    os._exit(0 if response.status_code == 302 else 1)
+
+
+def peak_rss_kb(target, *args):
+    """Пиковая память дочернего процесса, выполнившего `target`."""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            target(*args)
+        finally:
+            os._exit(1)
+    _, status, usage = os.wait4(pid, 0)
+    if os.waitstatus_to_exitcode(status):
+        raise RuntimeError('Загрузка не удалась')
+    return usage.ru_maxrss
+
+
+def idle():
+    os._exit(0)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пиковую память процесса при загрузке картинки '
+        'через форму поста.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cases', nargs='+', default=list(CASES), choices=list(CASES),
+        )
+        parser.add_argument(
+            '--unlimited',
+            action='store_true',
+            help='Для сравнения отключить ограничение размеров картинки.',
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            test_name = os.path.join(directory, 'bench.sqlite3')
+            connection.settings_dict['TEST']['NAME'] = test_name
+            old_config = setup_databases(verbosity=0, interactive=False)
+            limits = UNLIMITED if options['unlimited'] else {}
+            try:
+                with override_settings(
+                    MEDIA_ROOT=os.path.join(directory, 'media'), **limits
+                ):
+                    user = User.objects.create_user(username='bench_upload')
+                    connections.close_all()
+                    baseline = peak_rss_kb(idle)
+                    for name in options['cases']:
+                        self.bench(name, user, directory, baseline)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+    def bench(self, name, user, directory, baseline):
+        size, image_format, filename = CASES[name]
+        path = os.path.join(directory, filename)
+        Image.linear_gradient('L').resize(size).convert('RGB').save(
+            path, image_format
+        )
+        peak = peak_rss_kb(upload, user, path)
+        self.stdout.write(
+            f'{name:>10}: {os.path.getsize(path) / 2 ** 20:.1f} МБ, '
+            f'пик памяти +{(peak - baseline) / 1024:.0f} МБ'
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит варианты картинок для постов, у которых их еще нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересобрать варианты и у постов, где они уже есть.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image=None)
+        if not options['all']:
+            posts = posts.filter(image_variants='')
+        built = 0
+        for pk, name in posts.values_list('pk', 'image').iterator():
+            variants = images.build_variants(
+                name, force=options['all']
+            )
+            if variants:
+                Post.objects.filter(pk=pk).update(image_variants=variants)
+                built += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Построены варианты картинок для постов: {built}.'
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Выгружает пользователей, группы, посты, комментарии и подписки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл JSON Lines; по умолчанию стандартный вывод.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк читать из базы за раз.',
+        )
+
+    def report(self, name, count, seconds):
+        self.stderr.write(
+            f'{name}: {count} строк, {count / max(seconds, 1e-6):.0f} строк/с'
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            transfer.export(self.stdout, options['batch_size'], self.report)
+            return
+        with open(options['path'], 'w', encoding='utf-8') as stream:
+            transfer.export(stream, options['batch_size'], self.report)
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import search, transfer
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Загружает выгрузку export_yatube пачками по одной транзакции.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл JSON Lines; по умолчанию стандартный ввод.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк вставлять за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help='Не пересчитывать счетчики и ленты после загрузки.',
+        )
+
+    def report(self, name, count, seconds):
+        self.stdout.write(
+            f'{name}: {count} строк, {count / max(seconds, 1e-6):.0f} строк/с'
+        )
+
+    def handle(self, *args, **options):
+        with search.deferred_indexing(options['batch_size']):
+            if options['path'] == '-':
+                transfer.load(sys.stdin, options['batch_size'], self.report)
+            else:
+                with open(options['path'], encoding='utf-8') as stream:
+                    transfer.load(stream, options['batch_size'], self.report)
+        if not options['skip_derived']:
+            transfer.rebuild_derived(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена.'))
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:05
+
+import core.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_blobs(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    ImageBlob = apps.get_model('posts', 'ImageBlob')
+    rows = Post.objects.exclude(image='').exclude(image=None).order_by(
+    ).values('image').annotate(total=Count('pk')).values_list(
+        'image', 'total'
+    )
+    ImageBlob.objects.bulk_create(
+        (
+            ImageBlob(name=name, references=total)
+            for name, total in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Файл')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Постов с картинкой')),
+            ],
+            options={
+                'verbose_name': 'Файл картинки',
+                'verbose_name_plural': 'Файлы картинок',
+            },
+        ),
+        # Хранилище не меняет схему, а AlterField в SQLite пересоздал бы
+        # таблицу постов вместе с триггерами поискового индекса.
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='post',
+                name='image',
+                field=models.ImageField(blank=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+            ),
+        ]),
+        migrations.RunPython(fill_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def trim_timelines(apps, schema_editor):
+    # Прежняя версия 0003 заполняла ленты без обрезки до TIMELINE_LENGTH.
+    schema_editor.execute(
+        'DELETE FROM posts_timelineentry WHERE id IN ('
+        'SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+        'PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC'
+        ') AS position FROM posts_timelineentry) WHERE position > %s)',
+        [settings.TIMELINE_LENGTH],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_image_blobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(trim_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,184 @@
+import datetime
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.views.decorators.http import condition
+
+GENERATION_KEY = 'posts:generation:{}'
+PAGE_KEY = 'posts:page:{view}:{viewer}:{generations}:{path}'
+STALE_KEY = 'posts:stale:{view}:{viewer}:{path}'
+MODIFIED_KEY = 'posts:modified:{}'
+LOCK_TIMEOUT = 10
+GENERATION_CACHE = 'generations'
+
+
+def generation_cache():
+    """Кэш поколений и времени изменения, общий для всех процессов.
+
+    Страницы могут лежать в LocMemCache каждого воркера, но счетчик,
+    увеличенный одним воркером, должны увидеть все остальные, иначе
+    они продолжат отдавать старую страницу и 304.
+    """
+    return caches[GENERATION_CACHE]
+
+
+def _initial_generation():
+    # Счетчик, вытесненный из кэша, начинается заново с текущего
+    # времени, чтобы не совпасть со старыми ключами страниц.
+    return int(time.time() * 1000)
+
+
+def get_generations(scopes):
+    store = generation_cache()
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    generations = store.get_many(keys)
+    for scope, key in zip(scopes, keys):
+        if key not in generations:
+            store.add(key, _initial_generation(), None)
+            store.add(MODIFIED_KEY.format(scope), time.time(), None)
+            generations[key] = store.get(key)
+    return [generations[key] for key in keys]
+
+
+def get_last_modified(scopes):
+    """Время последнего изменения областей или None, если оно забыто."""
+    keys = [MODIFIED_KEY.format(scope) for scope in scopes]
+    modified = generation_cache().get_many(keys)
+    if not keys or len(modified) < len(keys):
+        return None
+    return datetime.datetime.fromtimestamp(
+        max(modified.values()), datetime.timezone.utc
+    )
+
+
+def _bump(scopes):
+    store = generation_cache()
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            store.incr(key)
+        except ValueError:
+            store.add(key, _initial_generation(), None)
+    now = time.time()
+    store.set_many({MODIFIED_KEY.format(scope): now for scope in scopes}, None)
+
+
+def bump(*scopes):
+    _bump(scopes)
+    # Повтор после коммита сбрасывает страницы, которые успели
+    # собрать из еще не закоммиченных данных.
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def _viewer(request):
+    return request.user.pk if request.user.is_authenticated else 'anon'
+
+
+def _path(request):
+    return hashlib.md5(request.get_full_path().encode()).hexdigest()
+
+
+def page_key(request, view_name, scopes):
+    return PAGE_KEY.format(
+        view=view_name,
+        viewer=_viewer(request),
+        generations='.'.join(map(str, get_generations(scopes))),
+        path=_path(request),
+    )
+
+
+def stale_key(request, view_name):
+    return STALE_KEY.format(
+        view=view_name, viewer=_viewer(request), path=_path(request)
+    )
+
+
+def _cacheable(response):
+    return response.status_code == 200 and not response.cookies
+
+
+def _render_with_lock(key, previous_key, timeout, stale_timeout, render):
+    """Пересобирает страницу под блокировкой или отдает прежнюю версию."""
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, True, LOCK_TIMEOUT):
+        response = cache.get(previous_key)
+        if response is not None:
+            return response
+        return render()
+    try:
+        response = render()
+        if _cacheable(response):
+            cache.set(key, response, timeout)
+            cache.set(previous_key, response, timeout + stale_timeout)
+    finally:
+        cache.delete(lock_key)
+    return response
+
+
+def cache_feed(timeout, scopes, stale_timeout=None):
+    """Кэширует страницу ленты до смены поколения любой из её областей.
+
+    С `stale_timeout` страницу после промаха пересобирает только
+    процесс, взявший блокировку, а остальные до этого отдают
+    предыдущую версию, которая хранится ещё `stale_timeout` секунд.
+
+    Поколения берутся из общего кэша `generations`, поэтому страницы
+    можно хранить и в LocMemCache каждого воркера: правка в одном
+    процессе меняет ключ страницы во всех, и `timeout` ограничивает
+    только время жизни записи, а не срок показа устаревшей ленты.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key = page_key(request, view.__name__, scopes(**kwargs))
+            response = cache.get(key)
+            if response is not None:
+                return response
+            if stale_timeout is not None:
+                return _render_with_lock(
+                    key,
+                    stale_key(request, view.__name__),
+                    timeout,
+                    stale_timeout,
+                    lambda: view(request, *args, **kwargs),
+                )
+            response = view(request, *args, **kwargs)
+            if _cacheable(response):
+                cache.set(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_feed(scopes):
+    """Отвечает 304, пока не изменилась ни одна из областей страницы.
+
+    Проверка стоит только чтения счетчиков из кэша и выполняется до
+    вызова представления. Last-Modified отдается только гостям: время
+    изменения не учитывает, кто смотрит страницу. Заголовок точен
+    до секунды, поэтому частые правки различает только ETag.
+    """
+    def get_scopes(request, kwargs):
+        if not hasattr(request, '_page_scopes'):
+            request._page_scopes = scopes(request, **kwargs)
+        return request._page_scopes
+
+    def etag(request, *args, **kwargs):
+        page_scopes = get_scopes(request, kwargs)
+        if not page_scopes:
+            return None
+        return hashlib.md5(
+            page_key(request, 'etag', page_scopes).encode()
+        ).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return get_last_modified(get_scopes(request, kwargs))
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,121 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.models import Post
+
+TABLE = 'posts_post_fts'
+MARK_START = '\x02'
+MARK_END = '\x03'
+WORD_RE = re.compile(r'\w+')
+INSERT_TRIGGER = 'posts_post_fts_insert'
+CREATE_INSERT_TRIGGER_SQL = (
+    f'CREATE TRIGGER IF NOT EXISTS {INSERT_TRIGGER} '
+    'AFTER INSERT ON posts_post BEGIN '
+    f'INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text); '
+    'END'
+)
+
+
+def build_query(text):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово берется в кавычки, чтобы операторы FTS5 из ввода
+    не ломали запрос; последнее слово ищется как префикс.
+    """
+    words = WORD_RE.findall(text)
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search(text):
+    """Посты, подходящие под запрос, с рангом bm25.
+
+    Меньший `search_rank` означает более релевантный пост.
+    """
+    query = build_query(text)
+    if not query:
+        return Post.objects.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).none()
+    return Post.objects.extra(
+        tables=[TABLE],
+        where=[f'{TABLE}.rowid = posts_post.id', f'{TABLE} MATCH %s'],
+        params=[query],
+    ).annotate(
+        search_rank=RawSQL(f'{TABLE}.rank', (), output_field=FloatField())
+    )
+
+
+def with_highlight(queryset):
+    """Добавляет текст с отмеченными совпадениями.
+
+    FTS5 не дает вызвать highlight() во вложенном запросе, поэтому
+    подсветка добавляется только к выборке, которая выводится на страницу.
+    """
+    return queryset.annotate(search_highlight=RawSQL(
+        f'highlight({TABLE}, 0, %s, %s)', (MARK_START, MARK_END)
+    ))
+
+
+def highlight(text):
+    return mark_safe(
+        escape(text)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def rebuild(batch_size):
+    """Заново индексирует все посты в одной транзакции.
+
+    Пока она идет, поиск видит прежний индекс, а не пустой, и сбой
+    на середине его не портит. Пачки ограничивают только размер
+    одного INSERT.
+    """
+    total = 0
+    last_id = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('delete-all')")
+        while True:
+            cursor.execute(
+                'SELECT MAX(id) FROM (SELECT id FROM posts_post '
+                'WHERE id > %s ORDER BY id LIMIT %s)',
+                (last_id, batch_size),
+            )
+            batch_end = cursor.fetchone()[0]
+            if batch_end is None:
+                return total
+            cursor.execute(
+                f'INSERT INTO {TABLE}(rowid, text) '
+                'SELECT id, text FROM posts_post '
+                'WHERE id > %s AND id <= %s',
+                (last_id, batch_end),
+            )
+            total += cursor.rowcount
+            last_id = batch_end
+
+
+@contextmanager
+def deferred_indexing(batch_size):
+    """Индексирует посты одним проходом после массовой загрузки.
+
+    На время загрузки снимается триггер вставки: построчное обновление
+    индекса замедляет вставку постов в несколько раз.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {INSERT_TRIGGER}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_INSERT_TRIGGER_SQL)
+        rebuild(batch_size)
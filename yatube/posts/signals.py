@@ -0,0 +1,164 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import tasks
+
+from posts import counters, events, images, page_cache, timeline
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+
+def post_scopes(post, group_ids=()):
+    scopes = ['index', f'post:{post.pk}']
+    if post.author_id is not None:
+        scopes.append(f'author:{post.author.username}')
+    group_ids = {post.group_id, *group_ids} - {None}
+    scopes.extend(
+        f'group:{slug}' for slug in Group.objects.filter(
+            pk__in=group_ids
+        ).values_list('slug', flat=True)
+    )
+    return scopes
+
+
+@receiver(post_save, sender=Post)
+def emit_saved_post(sender, instance, created, **kwargs):
+    if not kwargs.get('raw'):
+        events.emit(events.PUBLISH if created else events.EDIT, instance)
+
+
+@receiver(post_delete, sender=Post)
+def emit_deleted_post(sender, instance, **kwargs):
+    events.emit(events.DELETE, instance)
+
+
+@events.handler(events.PUBLISH)
+def fan_out_post(post):
+    timeline.fan_out(post)
+
+
+@events.handler(events.PUBLISH, events.EDIT)
+def build_post_images(post):
+    name = post.image.name if post.image else ''
+    if not name and not post.image_variants:
+        return
+    if (name and post.image_variants
+            and name == getattr(post, 'previous_image', None)):
+        return
+    # Кодирование вариантов занимает секунды, поэтому идет в очереди
+    # задач, а не в запросе, который сохранил пост.
+    tasks.enqueue(images.build_post_images, args=(post.pk, name))
+
+
+@events.handler(events.EDIT, events.DELETE)
+def collect_post_images(post):
+    images.collect_garbage()
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        counters.bump_user(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def count_image_references(sender, instance, created, **kwargs):
+    if kwargs.get('raw'):
+        return
+    name = instance.image.name if instance.image else None
+    previous = getattr(instance, 'previous_image', None) or None
+    if name == previous:
+        return
+    if name and not getattr(instance, 'image_uploaded', False):
+        images.retain(name)
+    if previous:
+        images.release(previous)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_image(sender, instance, **kwargs):
+    if instance.image:
+        images.release(instance.image.name)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        counters.bump_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        counters.bump_user(instance.author_id, 'followers_count', 1)
+        counters.bump_user(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'followers_count', -1)
+    counters.bump_user(instance.user_id, 'following_count', -1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post(sender, instance, **kwargs):
+    instance.previous_group_id = instance.previous_image = None
+    # Новую загрузку хранилище сохранит уже после этого сигнала и само
+    # возьмет на нее ссылку.
+    instance.image_uploaded = bool(
+        instance.image and not instance.image._committed
+    )
+    if instance.pk is not None and not kwargs.get('raw'):
+        instance.previous_group_id, instance.previous_image = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', 'image'
+            ).first() or (None, None)
+        )
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    page_cache.bump(*post_scopes(
+        instance, [getattr(instance, 'previous_group_id', None)]
+    ))
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_pages(sender, instance, **kwargs):
+    page_cache.bump(*post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    page_cache.bump(f'post:{instance.post_id}', 'comments')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, **kwargs):
+    page_cache.bump(
+        f'author:{instance.author.username}',
+        f'author:{instance.user.username}',
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    page_cache.bump(f'group:{instance.slug}', 'groups')
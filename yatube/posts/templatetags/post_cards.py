@@ -0,0 +1,62 @@
+import hashlib
+
+from django import template
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+CARD_KEY = 'posts:card:{variant}:{pk}:{version}'
+CARD_CACHE_TIME = 60 * 60
+
+
+def card_version(post):
+    """Отпечаток всего, что выводится в карточке поста.
+
+    У поста нет даты изменения, поэтому ключ меняется вместе с
+    текстом, картинкой, группой или именем автора.
+    """
+    author = post.author
+    parts = (
+        post.text,
+        post.pub_date.isoformat() if post.pub_date else '',
+        post.image.name if post.image else '',
+        post.image_variants,
+        post.group.slug if post.group_id else '',
+        author.username if author else '',
+        author.get_full_name() if author else '',
+    )
+    return hashlib.md5('\0'.join(parts).encode()).hexdigest()
+
+
+def _cacheable(post):
+    # Пока у картинки нет вариантов, карточка может содержать заглушку
+    # вместо миниатюры, которая строится в фоне.
+    return not post.image or bool(post.image_variants)
+
+
+@register.simple_tag
+def post_cards(posts, variant='feed'):
+    """HTML карточек постов страницы, взятый из кэша одним get_many."""
+    posts = list(posts)
+    keys = [
+        CARD_KEY.format(
+            variant=variant, pk=post.pk, version=card_version(post)
+        )
+        for post in posts
+    ]
+    cards = cache.get_many(keys)
+    rendered = {}
+    for key, post in zip(keys, posts):
+        if key in cards:
+            continue
+        cards[key] = get_template(CARD_TEMPLATE).render(
+            {'post': post, 'variant': variant}
+        )
+        if _cacheable(post):
+            rendered[key] = cards[key]
+    if rendered:
+        cache.set_many(rendered, CARD_CACHE_TIME)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,10 @@
+from django import template
+
+from posts import images
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post):
+    return {'post': post, 'picture': images.picture(post)}
@@ -0,0 +1,147 @@
+from unittest import mock
+
+from django.contrib.admin import helpers
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.paginator import EstimatedCountPaginator
+from posts.models import Comment, Group, Post, TimelineEntry, User
+from posts.tests import constants
+from posts.tests.utils import run_on_commit
+
+CHANGELIST_URL_NAME = 'admin:posts_post_changelist'
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        cls.follower = User.objects.create_user(
+            username=constants.USER_USERNAME
+        )
+        cls.groups = [
+            Group.objects.create(
+                title=f'{constants.GROUP_TITLE} {number}',
+                slug=f'{constants.GROUP_SLUG}-{number}',
+                description=constants.GROUP_DESCRIPTION,
+            )
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def create_posts(self, count):
+        with run_on_commit():
+            return [
+                Post.objects.create(
+                    text=constants.POST_TEXT,
+                    author=self.author,
+                    group=self.groups[number % len(self.groups)],
+                )
+                for number in range(count)
+            ]
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse(CHANGELIST_URL_NAME))
+        self.assertEqual(response.status_code, 200)
+        return len(captured)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.create_posts(2)
+        self.changelist_queries()
+        few = self.changelist_queries()
+        self.create_posts(20)
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_changelist_skips_exact_count(self):
+        self.create_posts(3)
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse(CHANGELIST_URL_NAME))
+        self.assertFalse(any(
+            'COUNT(*)' in query['sql'] and 'posts_post' in query['sql']
+            for query in captured
+        ))
+
+    def test_changelist_marks_capped_count(self):
+        self.create_posts(3)
+        with mock.patch.object(EstimatedCountPaginator, 'count_limit', 2):
+            response = self.client.get(
+                reverse(CHANGELIST_URL_NAME), {'q': constants.POST_TEXT}
+            )
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertContains(response, '2+ Посты')
+        with mock.patch.object(EstimatedCountPaginator, 'count_limit', 3):
+            response = self.client.get(
+                reverse(CHANGELIST_URL_NAME), {'q': constants.POST_TEXT}
+            )
+        self.assertContains(response, '3 Посты')
+        self.assertNotContains(response, '3+')
+
+    def test_changelist_marks_estimated_count(self):
+        self.create_posts(3)
+        response = self.client.get(reverse(CHANGELIST_URL_NAME))
+        self.assertContains(response, '≈3 Посты')
+
+    def test_changelist_filters_by_cached_year(self):
+        posts = self.create_posts(2)
+        Post.objects.filter(pk=posts[0].pk).update(
+            pub_date=posts[0].pub_date.replace(year=2001)
+        )
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse(CHANGELIST_URL_NAME))
+        self.assertFalse(any(
+            'DISTINCT' in query['sql'] for query in captured
+        ))
+        self.assertContains(response, '?year=2001')
+        response = self.client.get(
+            reverse(CHANGELIST_URL_NAME), {'year': 2001}
+        )
+        self.assertEqual(list(response.context['cl'].result_list), posts[:1])
+
+    def test_short_search_term_rejected(self):
+        self.create_posts(3)
+        response = self.client.get(
+            reverse(CHANGELIST_URL_NAME), {'q': 'Тестовый т'}
+        )
+        self.assertFalse(response.context['cl'].result_list)
+        self.assertContains(response, 'не короче 3 символов')
+
+    def post_action(self, action, posts, **data):
+        return self.client.post(reverse(CHANGELIST_URL_NAME), {
+            'action': action,
+            helpers.ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+            **data,
+        })
+
+    def test_reassign_group(self):
+        posts = self.create_posts(3)
+        group = self.groups[2]
+        self.post_action('reassign_group', posts[:2], group=group.pk)
+        self.assertEqual(Post.objects.filter(group=group).count(), 3)
+
+    def test_delete_posts(self):
+        self.follower.follower.create(author=self.author)
+        posts = self.create_posts(3)
+        Comment.objects.create(
+            post=posts[0], author=self.follower, text=constants.COMMENT_TEXT
+        )
+        self.post_action('delete_posts', posts[:2])
+        self.assertEqual(list(Post.objects.all()), [posts[2]])
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('post_id', flat=True)),
+            [posts[2].pk],
+        )
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.posts_count, 1)
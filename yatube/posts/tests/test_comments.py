@@ -0,0 +1,99 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import views
+from posts.models import Comment, Post, User
+from posts.tests import constants
+
+COMMENTS_URL_NAME = 'posts:post_comments'
+
+
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        cls.post = Post.objects.create(
+            text=constants.POST_TEXT, author=cls.author
+        )
+        Comment.objects.bulk_create([
+            Comment(
+                post=cls.post,
+                author=cls.author,
+                text=f'{constants.COMMENT_TEXT} {number}',
+            )
+            for number in range(views.COMMENT_COUNT * 2 + 5)
+        ])
+        cls.comments = list(
+            cls.post.comment.order_by('created', 'id').values_list(
+                'text', flat=True
+            )
+        )
+        cls.detail_url = reverse(
+            constants.POST_DETAIL_URL_NAME, kwargs={'post_id': cls.post.id}
+        )
+        cls.comments_url = reverse(
+            COMMENTS_URL_NAME, kwargs={'post_id': cls.post.id}
+        )
+
+    def test_post_detail_renders_first_page(self):
+        response = self.client.get(self.detail_url)
+        page = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in page],
+            self.comments[:views.COMMENT_COUNT],
+        )
+        self.assertContains(response, self.comments_url)
+        self.assertContains(response, f'data-after="{page.next_cursor}"')
+
+    def test_json_endpoint_walks_all_comments(self):
+        cursor = self.client.get(self.detail_url).context[
+            'comments'
+        ].next_cursor
+        texts = self.comments[:views.COMMENT_COUNT]
+        while cursor:
+            response = self.client.get(self.comments_url, {'after': cursor})
+            self.assertEqual(response['Content-Type'], 'application/json')
+            data = response.json()
+            self.assertLessEqual(len(data['comments']), views.COMMENT_COUNT)
+            texts.extend(comment['text'] for comment in data['comments'])
+            cursor = data['next']
+        self.assertEqual(texts, self.comments)
+
+    def test_json_comment_fields(self):
+        comment = self.client.get(self.comments_url).json()['comments'][0]
+        self.assertEqual(comment['author'], self.author.username)
+        self.assertEqual(
+            comment['author_url'],
+            reverse(constants.PROFILE_URL_NAME, args=(self.author.username,)),
+        )
+        self.assertEqual(comment['text'], self.comments[0])
+
+    def test_missing_post(self):
+        response = self.client.get(
+            reverse(COMMENTS_URL_NAME, kwargs={'post_id': self.post.id + 1})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_new_comment_changes_etag(self):
+        etag = self.client.get(self.comments_url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.author, text=constants.COMMENT_TEXT
+        )
+        response = self.client.get(
+            self.comments_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_without_author(self):
+        post = Post.objects.create(
+            text=constants.POST_TEXT, author=self.author
+        )
+        Comment.objects.create(post=post, text=constants.COMMENT_TEXT)
+        response = self.client.get(reverse(
+            constants.POST_DETAIL_URL_NAME, kwargs={'post_id': post.id}
+        ))
+        self.assertContains(response, constants.COMMENT_TEXT)
+        self.assertContains(response, 'Аноним')
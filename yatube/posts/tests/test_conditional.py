@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+from posts.tests import constants
+from posts.tests.utils import worker_caches
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(
+            text=constants.POST_TEXT, author=cls.author, group=cls.group
+        )
+        cls.urls = (
+            reverse(constants.INDEX_URL_NAME),
+            reverse(constants.GROUP_LIST_URL_NAME, args=(cls.group.slug,)),
+            reverse(constants.PROFILE_URL_NAME, args=(cls.author.username,)),
+            reverse(constants.POST_DETAIL_URL_NAME, args=(cls.post.pk,)),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+
+    def test_unchanged_pages_answer_304(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 304
+                )
+
+    def test_guest_if_modified_since(self):
+        url = self.urls[0]
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        ).status_code, 304)
+
+    def test_new_post_changes_validators(self):
+        responses = [self.client.get(url) for url in self.urls[:3]]
+        Post.objects.create(
+            text=constants.POST_TEXT, author=self.author, group=self.group
+        )
+        for url, response in zip(self.urls, responses):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    ).status_code,
+                    200,
+                )
+
+    def test_change_in_one_worker_seen_by_another(self):
+        url = self.urls[0]
+        with worker_caches() as worker:
+            with worker(0):
+                response = self.client.get(url)
+            with worker(1):
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 304
+                )
+                Post.objects.create(
+                    text=constants.POST_TEXT, author=self.author
+                )
+            with worker(0):
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                ).status_code, 200)
+
+    def test_comment_changes_post_detail(self):
+        url = self.urls[3]
+        response = self.client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text=constants.COMMENT_TEXT
+        )
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code, 200)
+
+    def test_etag_depends_on_viewer(self):
+        url = self.urls[0]
+        guest = self.client.get(url)
+        self.client.force_login(self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=guest['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_missing_post_is_404(self):
+        url = reverse(constants.POST_DETAIL_URL_NAME, args=(0,))
+        self.assertEqual(self.client.get(url).status_code, 404)
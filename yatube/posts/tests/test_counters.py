@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, User, UserStats
+from posts.tests import constants
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        cls.user = User.objects.create_user(username=constants.USER_USERNAME)
+
+    def get_stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counter(self):
+        post = Post.objects.create(
+            text=constants.POST_TEXT, author=self.author
+        )
+        self.assertEqual(self.get_stats(self.author).posts_count, 1)
+        post.delete()
+        self.assertEqual(self.get_stats(self.author).posts_count, 0)
+
+    def test_follow_counters(self):
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.get_stats(self.author).followers_count, 1)
+        self.assertEqual(self.get_stats(self.user).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.get_stats(self.author).followers_count, 0)
+        self.assertEqual(self.get_stats(self.user).following_count, 0)
+
+    def test_comment_counter(self):
+        post = Post.objects.create(
+            text=constants.POST_TEXT, author=self.author
+        )
+        comment = Comment.objects.create(
+            post=post, author=self.user, text=constants.COMMENT_TEXT
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+    def test_recount_stats_command(self):
+        post = Post.objects.create(
+            text=constants.POST_TEXT, author=self.author
+        )
+        Post.objects.bulk_create([
+            Post(text=constants.POST_TEXT, author=self.author)
+            for _ in range(2)
+        ])
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.user, text=constants.COMMENT_TEXT)
+        ])
+        UserStats.objects.all().delete()
+        call_command('recount_stats', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(self.get_stats(self.author).posts_count, 3)
+        self.assertEqual(self.get_stats(self.user).posts_count, 0)
+        self.assertEqual(post.comment_count, 1)
@@ -0,0 +1,101 @@
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import events
+from posts.models import Post, User
+from posts.tests import constants
+from posts.tests.utils import run_on_commit
+
+
+class PostEventsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+
+    def setUp(self):
+        self.calls = []
+        patcher = mock.patch.dict(events._handlers, {
+            events.PUBLISH: [self.record(events.PUBLISH)],
+            events.EDIT: [self.record(events.EDIT)],
+            events.DELETE: [self.record(events.DELETE)],
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, event):
+        def handler(post):
+            self.calls.append((event, post.text))
+        return handler
+
+    def test_handlers_wait_for_commit(self):
+        with run_on_commit():
+            post = Post.objects.create(
+                text=constants.POST_TEXT, author=self.author
+            )
+            self.assertEqual(self.calls, [])
+        self.assertEqual(self.calls, [(events.PUBLISH, constants.POST_TEXT)])
+        with run_on_commit():
+            post.text = constants.COMMENT_TEXT
+            post.save()
+            post.delete()
+        self.assertEqual(self.calls[1:], [
+            (events.EDIT, constants.COMMENT_TEXT),
+            (events.DELETE, constants.COMMENT_TEXT),
+        ])
+
+    def test_request_events_wait_for_response(self):
+        events.defer_events(sender=None)
+        self.addCleanup(events.run_deferred_events, sender=None)
+        with run_on_commit():
+            Post.objects.create(text=constants.POST_TEXT, author=self.author)
+        self.assertEqual(self.calls, [])
+        events.run_deferred_events(sender=None)
+        self.assertEqual(self.calls, [(events.PUBLISH, constants.POST_TEXT)])
+
+    def test_failing_handler_does_not_stop_others(self):
+        def broken(post):
+            raise ValueError
+        events._handlers[events.PUBLISH].insert(0, broken)
+        with self.assertLogs(events.logger, 'ERROR'):
+            with run_on_commit():
+                Post.objects.create(
+                    text=constants.POST_TEXT, author=self.author
+                )
+        self.assertEqual(self.calls, [(events.PUBLISH, constants.POST_TEXT)])
+
+    @override_settings(POST_EVENT_WORKERS=1)
+    def test_background_dispatch(self):
+        done = threading.Event()
+        threads = []
+
+        def handler(post):
+            threads.append(threading.current_thread())
+            done.set()
+        events._handlers[events.PUBLISH] = [handler]
+        with run_on_commit():
+            Post.objects.create(text=constants.POST_TEXT, author=self.author)
+        self.assertTrue(done.wait(5))
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_post_create_writes_post_once(self):
+        self.client.force_login(self.author)
+        with CaptureQueriesContext(connection) as captured:
+            self.client.post(
+                reverse(constants.POST_CREATE_URL_NAME),
+                {'text': constants.POST_TEXT},
+            )
+        writes = [
+            query['sql'] for query in captured
+            if query['sql'].startswith(('INSERT', 'UPDATE'))
+            and '"posts_post"' in query['sql'].split('SET')[0]
+        ]
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT'))
@@ -106,7 +106,7 @@ class PostFormTest(TestCase):
             Post.objects.filter(
                 text='POST_TEXT',
                 group=self.group.id,
-                image='posts/small.gif',
+                image__regex=r'^posts/(\w\w/){2}[0-9a-f]{64}\.gif$',
             ).exists()
         )
         self.assertRedirects(response, f'/posts/{self.post.id}/')
@@ -0,0 +1,198 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+from posts import bulk, images, thumbnails
+from posts.models import ImageBlob, Post, User, image_storage
+from posts.tests import constants
+from posts.tests.test_thumbnails import make_image
+from posts.tests.utils import run_on_commit
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageVariantsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_post(self, image):
+        with run_on_commit():
+            return Post.objects.create(
+                text=constants.POST_TEXT, author=self.author, image=image
+            )
+
+    def variant_path(self, post, width, extension='jpg'):
+        return os.path.join(
+            TEMP_MEDIA_ROOT,
+            images.variant_name(post.image.name, width, extension),
+        )
+
+    def variant_url(self, post, width):
+        return settings.MEDIA_URL + images.variant_name(
+            post.image.name, width, 'jpg'
+        )
+
+    def test_variants_built_on_save(self):
+        post = self.create_post(make_image('wide.png', (1000, 400)))
+        post.refresh_from_db()
+        self.assertIn('"widths": [320, 640, 960]', post.image_variants)
+        for width in (320, 640, 960):
+            with self.subTest(width=width):
+                self.assertTrue(
+                    os.path.exists(self.variant_path(post, width))
+                )
+                self.assertTrue(
+                    os.path.exists(self.variant_path(post, width, 'webp'))
+                )
+        self.assertFalse(os.path.exists(self.variant_path(post, 1920)))
+
+    def test_variants_built_outside_request(self):
+        self.client.force_login(self.author)
+        with mock.patch.object(images, '_encode') as encode, \
+                mock.patch.object(thumbnails, '_generate') as generate:
+            with run_on_commit(run_tasks=False):
+                self.client.post(
+                    reverse(constants.POST_CREATE_URL_NAME),
+                    {
+                        'text': constants.POST_TEXT,
+                        'image': make_image('upload.png', (1000, 400)),
+                    },
+                )
+            encode.assert_not_called()
+            generate.assert_not_called()
+        post = Post.objects.get()
+        self.assertEqual(post.image_variants, '')
+        self.assertTrue(
+            Task.objects.filter(name='posts.images.build_post_images')
+        )
+        tasks.work(burst=True)
+        post.refresh_from_db()
+        self.assertIn('"widths": [320, 640, 960]', post.image_variants)
+
+    def test_small_image_gets_smallest_variant(self):
+        post = self.create_post(make_image())
+        post.refresh_from_db()
+        self.assertIn('"widths": [320]', post.image_variants)
+
+    def test_feed_renders_srcset(self):
+        post = self.create_post(make_image('feed.png', (700, 300)))
+        response = self.client.get(reverse(constants.INDEX_URL_NAME))
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(
+            response,
+            f'{self.variant_url(post, 320)} 320w, '
+            f'{self.variant_url(post, 640)} 640w',
+        )
+        self.assertContains(response, f'src="{self.variant_url(post, 640)}"')
+        self.assertContains(
+            response, f'sizes="{settings.IMAGE_VARIANT_SIZES}"'
+        )
+
+    def test_variants_dropped_with_image(self):
+        post = self.create_post(make_image())
+        post.image = None
+        with run_on_commit():
+            post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants, '')
+
+    def test_command_builds_missing_variants(self):
+        post = self.create_post(make_image())
+        Post.objects.filter(pk=post.pk).update(image_variants='')
+        call_command('build_image_variants', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertIn('"widths": [320]', post.image_variants)
+
+    def test_duplicate_upload_reuses_file_and_variants(self):
+        first = self.create_post(make_image('first.png'))
+        with mock.patch.object(images, '_encode') as encode:
+            second = self.create_post(make_image('second.png'))
+        encode.assert_not_called()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_variants, second.image_variants)
+        self.assertEqual(
+            ImageBlob.objects.get(name=first.image.name).references, 2
+        )
+
+    def test_file_deleted_with_last_reference(self):
+        first = self.create_post(make_image())
+        second = self.create_post(make_image())
+        path = os.path.join(TEMP_MEDIA_ROOT, first.image.name)
+        with run_on_commit():
+            first.delete()
+        self.assertTrue(os.path.exists(path))
+        with run_on_commit():
+            second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(self.variant_path(second, 320)))
+        self.assertFalse(ImageBlob.objects.exists())
+
+    def test_reupload_survives_concurrent_garbage_collection(self):
+        first = self.create_post(make_image())
+        path = os.path.join(TEMP_MEDIA_ROOT, first.image.name)
+        first.delete()
+        save = image_storage._save
+
+        def save_then_collect(name, content):
+            # Сборщик мусора успевает пройти между сохранением файла
+            # и post_save нового поста.
+            name = save(name, content)
+            images.collect_garbage()
+            return name
+
+        with mock.patch.object(image_storage, '_save', save_then_collect):
+            second = self.create_post(make_image())
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(
+            ImageBlob.objects.get(name=second.image.name).references, 1
+        )
+
+    def test_replaced_image_is_released(self):
+        post = self.create_post(make_image())
+        old_name = post.image.name
+        post.image = make_image(size=(30, 20))
+        with run_on_commit():
+            post.save()
+        self.assertFalse(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, old_name))
+        )
+        self.assertEqual(
+            list(ImageBlob.objects.values_list('name', 'references')),
+            [(post.image.name, 1)],
+        )
+
+    def test_bulk_delete_releases_images(self):
+        post = self.create_post(make_image())
+        with run_on_commit():
+            bulk.delete_posts(Post.objects.filter(pk=post.pk))
+        self.assertFalse(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, post.image.name))
+        )
+        self.assertFalse(ImageBlob.objects.exists())
@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+from posts.tests import constants
+from posts.tests.utils import run_on_commit
+
+FEED_POSTS = 15
+
+
+class FeedIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        cls.user = User.objects.create_user(username=constants.USER_USERNAME)
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        with run_on_commit():
+            for i in range(FEED_POSTS):
+                Post.objects.create(
+                    text=f'{constants.POST_TEXT} {i}',
+                    author=cls.author,
+                    group=cls.group,
+                )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' '.join(row[-1] for row in cursor.fetchall())
+
+    def get_plans(self, url):
+        with CaptureQueriesContext(connection) as first_page:
+            response = self.authorized_client.get(url)
+        cursor = response.context['page_obj'].next_cursor
+        with CaptureQueriesContext(connection) as next_page:
+            self.authorized_client.get(url, {'after': cursor})
+        return [
+            (query['sql'], self.explain(query['sql']))
+            for query in first_page.captured_queries
+            + next_page.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'ORDER BY' in query['sql']
+        ]
+
+    def test_feed_queries_use_index_order(self):
+        urls = (
+            reverse(constants.INDEX_URL_NAME),
+            reverse(
+                constants.GROUP_LIST_URL_NAME,
+                kwargs={'slug': self.group.slug},
+            ),
+            reverse(
+                constants.PROFILE_URL_NAME,
+                kwargs={'username': self.author.username},
+            ),
+            reverse(constants.POST_FOLLOW_INDEX_URL_NAME),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                plans = self.get_plans(url)
+                self.assertTrue(plans)
+                for sql, plan in plans:
+                    self.assertIn('USING', plan, sql)
+                    self.assertNotIn('TEMP B-TREE', plan, sql)
@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import page_cache
+from posts.models import Group, Post, User
+from posts.templatetags import post_cards
+from posts.tests import constants
+
+
+class PostCardsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'{constants.POST_TEXT} {number}',
+                author=cls.author,
+                group=cls.group,
+            )
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_cards_are_not_rendered_again(self):
+        url = reverse(constants.INDEX_URL_NAME)
+        first = self.client.get(url)
+        page_cache.bump('index')
+        with mock.patch.object(post_cards, 'get_template') as get_template:
+            second = self.client.get(url)
+        get_template.assert_not_called()
+        self.assertEqual(first.content, second.content)
+
+    def test_edited_post_gets_new_card(self):
+        url = reverse(constants.INDEX_URL_NAME)
+        self.client.get(url)
+        post = self.posts[0]
+        post.text = 'Новый текст'
+        post.save()
+        self.assertContains(self.client.get(url), 'Новый текст')
+
+    def test_profile_variant_hides_author(self):
+        response = self.client.get(
+            reverse(constants.PROFILE_URL_NAME, args=(self.author.username,))
+        )
+        self.assertNotContains(response, 'все посты пользователя')
+        self.assertContains(response, 'все записи группы', count=3)
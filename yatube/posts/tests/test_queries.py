@@ -0,0 +1,62 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+from posts.tests import constants
+
+POST_DETAIL_QUERY_BUDGET = 2
+POST_DETAIL_AUTHORIZED_QUERY_BUDGET = 4
+
+
+class PostDetailQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        cls.group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(
+            text=constants.POST_TEXT,
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.url = reverse(
+            constants.POST_DETAIL_URL_NAME, kwargs={'post_id': cls.post.id}
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def add_comments(self, count):
+        start = User.objects.count()
+        commenters = [
+            User.objects.create_user(username=f'{constants.USER_USERNAME}{i}')
+            for i in range(start, start + count)
+        ]
+        Comment.objects.bulk_create([
+            Comment(
+                post=self.post, author=author, text=constants.COMMENT_TEXT
+            )
+            for author in commenters
+        ])
+
+    def test_post_detail_query_budget(self):
+        clients = {
+            POST_DETAIL_QUERY_BUDGET: self.client,
+            POST_DETAIL_AUTHORIZED_QUERY_BUDGET: self.authorized_client,
+        }
+        for comments in (1, 20):
+            self.add_comments(comments)
+            for budget, client in clients.items():
+                with self.subTest(comments=comments, budget=budget):
+                    with self.assertNumQueries(budget):
+                        response = client.get(self.url)
+                    self.assertEqual(
+                        response.context['post_count'], 1
+                    )
@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Post
+from posts.tests import constants
+
+User = get_user_model()
+
+SEARCH_URL_NAME = 'posts:search'
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        cls.cat = Post.objects.create(
+            text='Кот спит на <b>диване</b>', author=cls.author
+        )
+        cls.cats = Post.objects.create(
+            text='Кот, кот и еще один кот', author=cls.author
+        )
+        cls.dog = Post.objects.create(
+            text='Собака гуляет', author=cls.author
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        return self.client.get(reverse(SEARCH_URL_NAME), params)
+
+    def test_results_are_ranked(self):
+        response = self.get(q='кот')
+        self.assertEqual(
+            list(response.context['page_obj']), [self.cats, self.cat]
+        )
+
+    def test_highlight_escapes_text(self):
+        response = self.get(q='диван')
+        self.assertContains(response, '<mark>диване</mark>')
+        self.assertNotContains(response, '<b>диване</b>')
+
+    def test_operators_in_query_are_ignored(self):
+        response = self.get(q='кот" OR (собака')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['page_obj']), [])
+
+    def test_empty_query(self):
+        response = self.get(q='  ')
+        self.assertEqual(list(response.context['page_obj']), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.dog.text = 'Кот гуляет'
+        self.dog.save()
+        self.assertIn(self.dog, search.search('гуляет'))
+        self.assertNotIn(self.dog, search.search('собака'))
+        self.dog.delete()
+        self.assertFalse(search.search('гуляет').exists())
+
+    def test_keyset_pagination(self):
+        Post.objects.bulk_create(
+            Post(text=f'пирог номер {number}', author=self.author)
+            for number in range(15)
+        )
+        first = self.get(q='пирог').context['page_obj']
+        second = self.get(
+            q='пирог', after=first.next_cursor
+        ).context['page_obj']
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(second), 5)
+        self.assertFalse(set(first) & set(second))
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кот'}
+        )
+        self.assertEqual(
+            set(response.context['cl'].result_list), {self.cat, self.cats}
+        )
+        self.assertNotIn('LIKE', str(response.context['cl'].queryset.query))
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO posts_post_fts(posts_post_fts) "
+                "VALUES ('delete-all')"
+            )
+        self.assertFalse(search.search('кот').exists())
+        out = StringIO()
+        call_command('rebuild_search_index', batch_size=2, stdout=out)
+        self.assertIn('3', out.getvalue())
+        self.assertEqual(search.search('кот').count(), 2)
+
+    def test_failed_rebuild_keeps_index(self):
+        def fail_batch(execute, sql, params, many, context):
+            if sql.startswith('INSERT INTO posts_post_fts(rowid'):
+                raise DatabaseError('disk I/O error')
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(fail_batch):
+            with self.assertRaises(DatabaseError):
+                search.rebuild(batch_size=2)
+        self.assertEqual(search.search('кот').count(), 2)
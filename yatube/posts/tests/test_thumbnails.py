@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import tasks
+from core.models import Task
+from posts import images, thumbnails
+from posts.models import Post, User
+from posts.tests import constants
+from posts.tests.utils import run_on_commit
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='image.png', size=(40, 20)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        # Миниатюры sorl остаются запасным путем для постов без
+        # готовых вариантов картинки.
+        patcher = mock.patch.object(
+            images, 'build_variants', return_value=''
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_feed_does_not_build_missing_thumbnail(self):
+        with mock.patch.object(thumbnails, 'build_presets'):
+            Post.objects.create(
+                text=constants.POST_TEXT,
+                author=self.author,
+                image=make_image(),
+            )
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            response = self.client.get(reverse(constants.INDEX_URL_NAME))
+        schedule.assert_called_once()
+        self.assertContains(response, 'aspect-ratio: 960 / 339')
+        self.assertNotContains(response, '<img class="card-img')
+
+    def test_feed_serves_thumbnail_built_on_save(self):
+        with run_on_commit():
+            Post.objects.create(
+                text=constants.POST_TEXT,
+                author=self.author,
+                image=make_image(),
+            )
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            response = self.client.get(reverse(constants.INDEX_URL_NAME))
+        schedule.assert_not_called()
+        self.assertContains(response, '<img class="card-img')
+        self.assertNotContains(response, 'aspect-ratio: 960 / 339')
+
+    def test_missing_thumbnail_built_by_task_queue(self):
+        with mock.patch.object(thumbnails, 'build_presets'):
+            Post.objects.create(
+                text=constants.POST_TEXT,
+                author=self.author,
+                image=make_image(),
+            )
+        for url in (
+            reverse(constants.INDEX_URL_NAME),
+            reverse(constants.PROFILE_URL_NAME, args=(self.author.username,)),
+        ):
+            self.client.get(url)
+        self.assertEqual(Task.objects.filter(
+            name='posts.thumbnails.build_thumbnail'
+        ).count(), 1)
+        tasks.work(burst=True)
+        cache.clear()
+        response = self.client.get(reverse(constants.INDEX_URL_NAME))
+        self.assertContains(response, '<img class="card-img')
@@ -0,0 +1,158 @@
+import datetime
+
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+from posts.tests import constants
+from posts.tests.utils import run_on_commit
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        cls.user = User.objects.create_user(
+            username=constants.USER_USERNAME
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def follow(self):
+        self.authorized_client.get(reverse(
+            constants.POST_PROFILE_FOLLOW_URL_NAME,
+            kwargs={'username': self.author.username},
+        ))
+
+    def get_feed(self):
+        response = self.authorized_client.get(
+            reverse(constants.POST_FOLLOW_INDEX_URL_NAME)
+        )
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_timeline(self):
+        post = Post.objects.create(
+            text=constants.POST_TEXT, author=self.author
+        )
+        self.follow()
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(self.get_feed(), [post])
+
+    def test_new_post_fans_out_to_followers(self):
+        self.follow()
+        with run_on_commit():
+            post = Post.objects.create(
+                text=constants.POST_TEXT, author=self.author
+            )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+
+    def test_unfollow_drops_author_entries(self):
+        self.follow()
+        Post.objects.create(text=constants.POST_TEXT, author=self.author)
+        self.authorized_client.get(reverse(
+            constants.POST_PROFILE_UNFOLLOW_URL_NAME,
+            kwargs={'username': self.author.username},
+        ))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user))
+        self.assertEqual(self.get_feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_large_author_is_read_on_demand(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(
+            text=constants.POST_TEXT, author=self.author
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user))
+        self.assertEqual(self.get_feed(), [post])
+
+    def assert_pull_does_not_write(self):
+        with CaptureQueriesContext(connection) as captured:
+            timeline.pull(self.user)
+        self.assertFalse([
+            query for query in captured
+            if '"posts_timelineentry"' in query['sql']
+            and not query['sql'].startswith('SELECT')
+        ])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pull_does_not_write_without_new_posts(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(
+            text=constants.POST_TEXT, author=self.author
+        )
+        timeline.pull(self.user)
+        self.assert_pull_does_not_write()
+        self.assertEqual(self.get_feed(), [post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0, TIMELINE_LENGTH=2)
+    def test_pull_skips_posts_older_than_full_timeline(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        old_post = Post.objects.create(
+            text=constants.POST_TEXT, author=self.author,
+        )
+        Post.objects.filter(pk=old_post.pk).update(
+            pub_date=old_post.pub_date - datetime.timedelta(days=1)
+        )
+        other = User.objects.create_user(username='other')
+        Post.objects.bulk_create([
+            Post(text=constants.POST_TEXT, author=other) for _ in range(2)
+        ])
+        timeline.backfill(self.user, other)
+        self.assert_pull_does_not_write()
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pull_reads_all_large_authors_in_one_query(self):
+        other = User.objects.create_user(username='other')
+        for author in (self.author, other):
+            Follow.objects.create(user=self.user, author=author)
+        posts = [
+            Post.objects.create(text=constants.POST_TEXT, author=author)
+            for author in (self.author, other)
+        ]
+        timeline.pull(self.user)
+        self.assertEqual(set(self.get_feed()), set(posts))
+        with self.assertNumQueries(1):
+            timeline.pull(self.user)
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_rebuild_fills_and_trims_timelines(self):
+        Post.objects.bulk_create([
+            Post(text=constants.POST_TEXT, author=self.author)
+            for _ in range(3)
+        ])
+        Follow.objects.bulk_create([
+            Follow(user=self.user, author=self.author)
+        ])
+        with self.assertNumQueries(2):
+            timeline.rebuild()
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(
+                user=self.user
+            ).values_list('post_id', flat=True).order_by('post_id')),
+            list(Post.objects.values_list(
+                'pk', flat=True
+            ).order_by('pk')[1:]),
+        )
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_timeline_is_trimmed(self):
+        Post.objects.bulk_create([
+            Post(text=constants.POST_TEXT, author=self.author)
+            for _ in range(5)
+        ])
+        self.follow()
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), 2
+        )
@@ -0,0 +1,74 @@
+import datetime
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import search
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.tests import constants
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class TransferCommandsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username=constants.AUTHOR_USERNAME
+        )
+        self.reader = User.objects.create_user(
+            username=constants.USER_USERNAME
+        )
+        group = Group.objects.create(
+            title=constants.GROUP_TITLE,
+            slug=constants.GROUP_SLUG,
+            description=constants.GROUP_DESCRIPTION,
+        )
+        self.post = Post.objects.create(
+            text=constants.POST_TEXT, author=self.author, group=group
+        )
+        self.pub_date = timezone.now() - datetime.timedelta(days=400)
+        Post.objects.filter(pk=self.post.pk).update(pub_date=self.pub_date)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text=constants.COMMENT_TEXT
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.path = os.path.join(TEMP_DIR, 'dump.jsonl')
+
+    def test_round_trip(self):
+        call_command('export_yatube', self.path, stderr=StringIO())
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+        out = StringIO()
+        call_command('import_yatube', self.path, batch_size=1, stdout=out)
+        self.assertIn('строк/с', out.getvalue())
+        post = Post.objects.select_related('author__stats').get()
+        self.assertEqual(post.pk, self.post.pk)
+        self.assertEqual(post.pub_date, self.pub_date)
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(post.author.stats.followers_count, 1)
+        self.assertEqual(
+            User.objects.get(pk=self.reader.pk).password,
+            self.reader.password,
+        )
+        self.assertTrue(TimelineEntry.objects.filter(
+            user_id=self.reader.pk, post=post
+        ).exists())
+        self.assertIn(post, search.search(constants.POST_TEXT))
+
+    def test_export_to_stdout(self):
+        out = StringIO()
+        call_command('export_yatube', stdout=out, stderr=StringIO())
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[0].startswith('{"model": "user"'))
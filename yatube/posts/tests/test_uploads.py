@@ -0,0 +1,97 @@
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image, ImageFile
+
+from posts.forms import PostForm
+from posts.tests import constants
+
+
+def make_upload(name, size, image_format, **options):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def make_animation(name, size):
+    buffer = BytesIO()
+    frames = [Image.new('RGB', size, color) for color in ('red', 'blue')]
+    frames[0].save(buffer, 'GIF', save_all=True, append_images=frames[1:])
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(IMAGE_UPLOAD_MAX_SIDE=100)
+class ImageUploadTest(SimpleTestCase):
+    def clean(self, upload):
+        form = PostForm(
+            data={'text': constants.POST_TEXT}, files={'image': upload}
+        )
+        return form, form.is_valid()
+
+    def test_oversized_jpeg_downsampled_without_metadata(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camera'
+        form, valid = self.clean(
+            make_upload('photo.jpg', (400, 200), 'JPEG', exif=exif.tobytes())
+        )
+        self.assertTrue(valid, form.errors)
+        image_file = form.cleaned_data['image']
+        self.assertEqual(image_file.name, 'photo.jpg')
+        with Image.open(image_file) as image:
+            self.assertEqual(image.format, 'JPEG')
+            # Поворот из EXIF применен до того, как метаданные удалены.
+            self.assertEqual(image.size, (50, 100))
+            self.assertNotIn('exif', image.info)
+
+    def test_small_png_keeps_size(self):
+        form, valid = self.clean(make_upload('small.png', (40, 20), 'PNG'))
+        self.assertTrue(valid, form.errors)
+        with Image.open(form.cleaned_data['image']) as image:
+            self.assertEqual((image.format, image.size), ('PNG', (40, 20)))
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=100)
+    def test_too_many_pixels_rejected_before_decode(self):
+        upload = make_upload('bomb.png', (20, 20), 'PNG')
+        with mock.patch.object(ImageFile.ImageFile, 'load') as load:
+            form, valid = self.clean(upload)
+        self.assertFalse(valid)
+        self.assertIn('image', form.errors)
+        load.assert_not_called()
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=10)
+    def test_large_file_rejected(self):
+        form, valid = self.clean(make_upload('big.png', (40, 20), 'PNG'))
+        self.assertFalse(valid)
+        self.assertIn('image', form.errors)
+
+    def test_mpo_saved_as_jpeg(self):
+        buffer = BytesIO()
+        frames = [Image.new('RGB', (400, 200), color) for color in (
+            'red', 'blue'
+        )]
+        frames[0].save(buffer, 'MPO', save_all=True, append_images=frames[1:])
+        form, valid = self.clean(
+            SimpleUploadedFile('stereo.jpg', buffer.getvalue())
+        )
+        self.assertTrue(valid, form.errors)
+        with Image.open(form.cleaned_data['image']) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (100, 50)))
+
+    def test_unsupported_format_rejected(self):
+        form, valid = self.clean(make_upload('image.bmp', (40, 20), 'BMP'))
+        self.assertFalse(valid)
+        self.assertIn('image', form.errors)
+
+    def test_animation_kept_as_is(self):
+        upload = make_animation('loop.gif', (40, 20))
+        form, valid = self.clean(upload)
+        self.assertTrue(valid, form.errors)
+        self.assertIs(form.cleaned_data['image'], upload)
+
+    def test_large_animation_rejected(self):
+        form, valid = self.clean(make_animation('loop.gif', (400, 20)))
+        self.assertFalse(valid)
+        self.assertIn('image', form.errors)
@@ -1,3 +1,5 @@
+import base64
+import json
 from http import HTTPStatus
 
 from django import forms
@@ -8,6 +10,7 @@ from django.urls import reverse
 
 from posts.models import Post, Group, User, Follow
 from posts.tests import constants
+from posts.tests.utils import worker_caches
 
 TEST_PAGINATOR_PAGE = 10
 
@@ -100,7 +103,7 @@ class PostViewsTest(TestCase):
             reverse(constants.POST_DETAIL_URL_NAME,
                     kwargs={'post_id': self.post.id}
                     ))
-        context = ('post', 'posts')
+        context = ('post', 'post_count')
         for key in context:
             self.assertIn(key, response.context)
         response_post_detail = response.context.get('post')
@@ -184,18 +187,53 @@ class PostViewsTest(TestCase):
             reverse(constants.INDEX_URL_NAME)
         )
         content = response.content
-        self.post.delete()
+        Post.objects.filter(pk=self.post.pk).update(text='Обновленный текст')
         response_2 = self.authorized_client_author.get(
             reverse(constants.INDEX_URL_NAME)
         )
-        content_cache = response_2.content
-        self.assertEqual(content, content_cache)
-        cache.clear()
+        self.assertIsNone(response_2.context)
+        self.assertEqual(content, response_2.content)
+        self.post.delete()
         response_3 = self.authorized_client_author.get(
             reverse(constants.INDEX_URL_NAME)
         )
-        cache_clear = response_3.content
-        self.assertNotEqual(content, cache_clear)
+        self.assertNotEqual(content, response_3.content)
+
+    def test_cache_invalidated_on_new_post(self):
+        urls = (
+            reverse(constants.INDEX_URL_NAME),
+            reverse(
+                constants.GROUP_LIST_URL_NAME,
+                kwargs={'slug': self.group.slug},
+            ),
+            reverse(
+                constants.PROFILE_URL_NAME,
+                kwargs={'username': self.author.username},
+            ),
+        )
+        for url in urls:
+            self.client.get(url)
+        new_post = Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn(new_post, response.context['page_obj'])
+
+    def test_cache_invalidated_in_other_worker(self):
+        url = reverse(constants.INDEX_URL_NAME)
+        with worker_caches() as worker:
+            for n in range(2):
+                with worker(n):
+                    self.client.get(url)
+            with worker(1):
+                new_post = Post.objects.create(
+                    text='Новый пост', author=self.author
+                )
+            with worker(0):
+                response = self.client.get(url)
+        self.assertIn(new_post, response.context['page_obj'])
 
     def test_follow_index_context(self):
         response = self.authorized_client.get(
@@ -322,3 +360,72 @@ class PaginatorViewsTest(TestCase):
                 self.assertQuerysetEqual(
                     page_obj, queryset, transform=lambda x: x
                 )
+
+    def test_paginator_next_and_previous_cursor(self):
+        posts = list(self.author.posts.all())
+        response = self.client.get(reverse(constants.INDEX_URL_NAME))
+        first_page = response.context['page_obj']
+        self.assertFalse(first_page.has_previous())
+        self.assertTrue(first_page.has_next())
+        response = self.client.get(
+            reverse(constants.INDEX_URL_NAME),
+            {'after': first_page.next_cursor},
+        )
+        second_page = response.context['page_obj']
+        self.assertEqual(
+            list(second_page), posts[TEST_PAGINATOR_PAGE:]
+        )
+        self.assertTrue(second_page.has_previous())
+        self.assertFalse(second_page.has_next())
+        response = self.client.get(
+            reverse(constants.INDEX_URL_NAME),
+            {'before': second_page.previous_cursor},
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), posts[:TEST_PAGINATOR_PAGE]
+        )
+
+    def test_paginator_invalid_cursor(self):
+        response = self.client.get(
+            reverse(constants.INDEX_URL_NAME), {'after': 'не-курсор'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertQuerysetEqual(
+            response.context['page_obj'],
+            Post.objects.all()[:TEST_PAGINATOR_PAGE],
+            transform=lambda x: x,
+        )
+
+    def test_paginator_tampered_cursor(self):
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        reader_client = Client()
+        reader_client.force_login(reader)
+        cursors = (
+            ['abc', 1],
+            ['2020-01-01T00:00:00', 'x'],
+            [{}, 1],
+            [None, None],
+        )
+        pages = (
+            (self.client, constants.INDEX_URL_NAME, {}),
+            (reader_client, constants.POST_FOLLOW_INDEX_URL_NAME, {}),
+            (self.client, 'posts:search', {'q': constants.POST_TEXT}),
+        )
+        for client, url, params in pages:
+            first_page = list(
+                client.get(reverse(url), params).context['page_obj']
+            )
+            for values in cursors:
+                cursor = base64.urlsafe_b64encode(
+                    json.dumps(values).encode()
+                ).decode()
+                for direction in ('after', 'before'):
+                    with self.subTest(url=url, cursor=values, to=direction):
+                        response = client.get(
+                            reverse(url), {**params, direction: cursor}
+                        )
+                        self.assertEqual(response.status_code, HTTPStatus.OK)
+                        self.assertEqual(
+                            list(response.context['page_obj']), first_page
+                        )
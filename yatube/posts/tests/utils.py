@@ -0,0 +1,56 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core import tasks
+from core.cache_backends import SQLiteCache
+from posts import page_cache
+
+
+@contextmanager
+def run_on_commit(using=DEFAULT_DB_ALIAS, run_tasks=True):
+    """Выполняет колбэки `on_commit`, отложенные внутри блока.
+
+    TestCase не коммитит транзакцию теста, поэтому без этого
+    обработчики событий поста в тестах не запускаются. С `run_tasks`
+    затем выполняются и поставленные ими задачи очереди.
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    while len(connection.run_on_commit) > start:
+        _, callback = connection.run_on_commit.pop(start)
+        callback()
+    if run_tasks:
+        tasks.work(burst=True)
+
+
+@contextmanager
+def worker_caches(count=2):
+    """Кэши `count` воркеров gunicorn: у каждого свой LocMemCache.
+
+    Кэш поколений у всех общий, но каждый воркер держит к нему
+    отдельное подключение. Возвращает функцию, которая на время блока
+    `with` подменяет кэши в `posts.page_cache` кэшами воркера `n`.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        location = os.path.join(directory, 'generations.sqlite3')
+        workers = [
+            (LocMemCache(f'worker-{n}', {}), SQLiteCache(location, {}))
+            for n in range(count)
+        ]
+
+        @contextmanager
+        def worker(n):
+            pages, generations = workers[n]
+            with mock.patch.object(page_cache, 'cache', pages):
+                with mock.patch.object(
+                    page_cache, 'generation_cache', lambda: generations
+                ):
+                    yield
+
+        yield worker
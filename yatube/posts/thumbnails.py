@@ -0,0 +1,99 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.engines.pil_engine import Engine
+from sorl.thumbnail.images import ImageFile
+
+from core import profiling, tasks
+from posts.models import image_storage
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'posts:thumbnail:pending:{}'
+PENDING_TIMEOUT = 10 * 60
+
+
+class PillowEngine(Engine):
+    def _scale(self, image, width, height):
+        return image.resize((width, height), resample=Image.LANCZOS)
+
+
+class PrecomputedThumbnailBackend(ThumbnailBackend):
+    """Отдает только готовые миниатюры, не декодируя картинки в запросе.
+
+    Миниатюры заранее строит очередь задач после сохранения поста.
+    Если миниатюры все же нет, тег `{% thumbnail %}` получает None
+    и выводит блок `{% empty %}`, а построение миниатюры ставится
+    в ту же очередь. Веб-процесс не трогает сами файлы картинок.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        with profiling.measure('thumbnail'):
+            name = self._prepare(file_, geometry_string, options)
+            cached = default.kvstore.get(ImageFile(name, default.storage))
+        if cached:
+            return cached
+        schedule(getattr(file_, 'name', file_), geometry_string, options)
+        return None
+
+    def generate(self, file_, geometry_string, **options):
+        return super().get_thumbnail(file_, geometry_string, **options)
+
+    def _prepare(self, file_, geometry_string, options):
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return self._get_thumbnail_filename(source, geometry_string, options)
+
+
+def _generate(name, geometry_string, options):
+    try:
+        with profiling.measure('thumbnail'):
+            # Ключ миниатюры sorl строится из имени и хранилища
+            # исходника, поэтому он передается с хранилищем поля.
+            PrecomputedThumbnailBackend().generate(
+                ImageFile(name, image_storage), geometry_string, **options
+            )
+    except Exception:
+        logger.exception('Не удалось построить миниатюру %s', name)
+
+
+def build_thumbnail(name, geometry_string, options):
+    if image_storage.exists(name):
+        _generate(name, geometry_string, options)
+
+
+def schedule(name, geometry_string, options):
+    """Ставит построение миниатюры в очередь задач.
+
+    Одна и та же миниатюра ставится не чаще раза в PENDING_TIMEOUT
+    на кэш, даже если ее ждут все карточки страницы. Лишняя задача
+    из другого воркера только увидит, что миниатюра уже готова.
+    """
+    key = hashlib.md5(
+        repr((name, geometry_string, sorted(options.items()))).encode()
+    ).hexdigest()
+    if cache.add(PENDING_KEY.format(key), True, PENDING_TIMEOUT):
+        tasks.enqueue(
+            build_thumbnail, args=(name, geometry_string, dict(options))
+        )
+
+
+def build_presets(name):
+    for geometry_string, options in settings.THUMBNAIL_PRESETS:
+        _generate(name, geometry_string, dict(options))
@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Follow, Post, TimelineEntry
+
+# Каждому подписчику — последние TIMELINE_LENGTH постов его авторов.
+REBUILD_SQL = (
+    'INSERT INTO posts_timelineentry (user_id, post_id, author_id, pub_date) '
+    'SELECT user_id, post_id, author_id, pub_date FROM ('
+    'SELECT follow.user_id, post.id AS post_id, post.author_id, '
+    'post.pub_date, ROW_NUMBER() OVER ('
+    'PARTITION BY follow.user_id '
+    'ORDER BY post.pub_date DESC, post.id DESC) AS position '
+    'FROM posts_follow AS follow '
+    'JOIN posts_post AS post ON post.author_id = follow.author_id '
+    'WHERE post.pub_date IS NOT NULL'
+    ') WHERE position <= %s '
+    'ON CONFLICT (user_id, post_id) DO NOTHING'
+)
+TRIM_ALL_SQL = (
+    'DELETE FROM posts_timelineentry WHERE id IN ('
+    'SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+    'PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC'
+    ') AS position FROM posts_timelineentry) WHERE position > %s)'
+)
+
+
+def _entries(user_id, posts):
+    return [
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, author_id, pub_date in posts
+    ]
+
+
+def _save(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    if post.author_id is None or post.pub_date is None:
+        return
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id', flat=True
+        )[:settings.TIMELINE_FANOUT_LIMIT + 1]
+    )
+    if len(follower_ids) > settings.TIMELINE_FANOUT_LIMIT:
+        return
+    post_row = [(post.pk, post.author_id, post.pub_date)]
+    _save([
+        entry
+        for user_id in follower_ids
+        for entry in _entries(user_id, post_row)
+    ])
+
+
+def backfill(user, author):
+    posts = Post.objects.filter(
+        author=author, pub_date__isnull=False
+    ).values_list(
+        'pk', 'author_id', 'pub_date'
+    ).order_by('-pub_date', '-pk')[:settings.TIMELINE_LENGTH]
+    _save(_entries(user.pk, posts))
+    trim(user)
+
+
+def rebuild():
+    """Заполняет ленты всех подписчиков одним INSERT ... SELECT.
+
+    Затем одним DELETE ленты обрезаются до TIMELINE_LENGTH вместе
+    с записями, которые были в них раньше.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD_SQL, [settings.TIMELINE_LENGTH])
+        cursor.execute(TRIM_ALL_SQL, [settings.TIMELINE_LENGTH])
+
+
+def drop(user, author_id):
+    TimelineEntry.objects.filter(user=user, author_id=author_id).delete()
+
+
+def trim(user):
+    cutoff = TimelineEntry.objects.filter(user=user).order_by(
+        '-pub_date', '-post_id'
+    ).values_list('pub_date', flat=True)[
+        settings.TIMELINE_LENGTH:settings.TIMELINE_LENGTH + 1
+    ]
+    cutoff = list(cutoff)
+    if cutoff:
+        TimelineEntry.objects.filter(
+            user=user, pub_date__lt=cutoff[0]
+        ).delete()
+
+
+def celebrity_ids(user):
+    return Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True)
+
+
+def _oldest_kept(user):
+    """Подзапрос: дата самой старой записи, которую trim оставит."""
+    return Subquery(TimelineEntry.objects.filter(user=user).order_by(
+        '-pub_date', '-post_id'
+    ).values('pub_date')[
+        settings.TIMELINE_LENGTH - 1:settings.TIMELINE_LENGTH
+    ])
+
+
+def pull(user):
+    """Дописывает в ленту новые посты авторов без fan_out.
+
+    Посты всех таких авторов читаются одним запросом: только те,
+    которых еще нет в ленте и которые не старше самой старой записи
+    заполненной ленты — более старые trim удалил бы сразу. Остальные
+    посты этих авторов лента получила при подписке, поэтому выборка
+    состоит из постов, вышедших после прошлого pull, и сортируется
+    здесь, а не во временном индексе базы. Если таких постов нет,
+    лента не пишется.
+    """
+    posts = Post.objects.filter(
+        author_id__in=celebrity_ids(user),
+        pub_date__isnull=False,
+        pub_date__gte=Coalesce(_oldest_kept(user), F('pub_date')),
+    ).exclude(
+        timeline__user=user
+    ).order_by().values_list('pk', 'author_id', 'pub_date')
+    posts = sorted(
+        posts, key=lambda row: (row[2], row[0]), reverse=True
+    )[:settings.TIMELINE_LENGTH]
+    if posts:
+        _save(_entries(user.pk, posts))
+        trim(user)
+
+
+def feed(user):
+    pull(user)
+    return Post.objects.select_related('group', 'author').filter(
+        timeline__user=user
+    ).annotate(
+        feed_pub_date=F('timeline__pub_date'),
+        feed_post_id=F('timeline__post_id'),
+    )
@@ -0,0 +1,88 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from core import metrics
+
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+    'GIF': {},
+}
+# MPO — JPEG с дополнительными кадрами (стереопара, превью), так
+# снимают многие камеры и телефоны. Сохраняется первый кадр.
+SAVE_FORMATS = {'MPO': 'JPEG'}
+
+
+def _check(upload, image):
+    if upload.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)s.',
+            params={'limit': filesizeformat(settings.IMAGE_UPLOAD_MAX_SIZE)},
+            code='file_too_large',
+        )
+    if SAVE_FORMATS.get(image.format, image.format) not in SAVE_OPTIONS:
+        raise ValidationError(
+            'Поддерживаются картинки JPEG, PNG, GIF и WebP.',
+            code='invalid_format',
+        )
+    width, height = image.size
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)s×%(height)s слишком большая.',
+            params={'width': width, 'height': height},
+            code='too_many_pixels',
+        )
+
+
+def normalize(upload):
+    """Проверяет загруженную картинку и готовит ее к сохранению.
+
+    Размеры читаются из заголовка до декодирования, поэтому бомбы
+    отсекаются сразу. JPEG декодируется сразу в уменьшенном масштабе,
+    картинка ужимается до IMAGE_UPLOAD_MAX_SIDE по большей стороне и
+    пересохраняется без EXIF и прочих метаданных во временный файл.
+    Анимации сохраняются как есть, если укладываются в ограничения.
+    """
+    metrics.UPLOAD_SIZE.observe(upload.size)
+    upload.seek(0)
+    image = Image.open(upload)
+    _check(upload, image)
+    limit = settings.IMAGE_UPLOAD_MAX_SIDE
+    image_format = SAVE_FORMATS.get(image.format, image.format)
+    if image_format == image.format and getattr(image, 'is_animated', False):
+        if max(image.size) > limit:
+            raise ValidationError(
+                'Анимация больше %(limit)s точек по стороне.',
+                params={'limit': limit},
+                code='animation_too_large',
+            )
+        upload.seek(0)
+        return upload
+    icc_profile = image.info.get('icc_profile')
+    ratio = limit / max(image.size)
+    if ratio < 1:
+        # Для JPEG это масштабирование при декодировании: полноразмерная
+        # картинка в память не попадает.
+        image.draft(None, (
+            round(image.width * ratio), round(image.height * ratio)
+        ))
+    image.thumbnail((limit, limit), Image.LANCZOS, reducing_gap=None)
+    ImageOps.exif_transpose(image, in_place=True)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L', 'CMYK'):
+        image = image.convert('RGB')
+    options = dict(SAVE_OPTIONS[image_format])
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    output = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    image.save(output, image_format, **options)
+    output.seek(0)
+    return File(output, name=os.path.basename(upload.name))
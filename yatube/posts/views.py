@@ -1,21 +1,78 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
+from django.urls import reverse
+from django.utils.http import urlencode
 
+from core.paginator import KeysetPaginator
+from posts import counters, search as post_search, timeline
+from posts.page_cache import cache_feed, conditional_feed
 from posts.forms import PostForm, CommentForm
-from posts.models import Post, Group, User, Comment, Follow
+from posts.models import Post, Group, User, Follow
 
 POST_COUNT = 10
-CACHE_TIME = 20
+COMMENT_COUNT = 20
+CACHE_TIME = 60 * 5
+STALE_CACHE_TIME = 60
 
 
-@cache_page(CACHE_TIME)
+def get_page_obj(request, posts, ordering=('-pub_date', '-id')):
+    paginator = KeysetPaginator(posts, POST_COUNT, ordering=ordering)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+
+def get_post(request, post_id):
+    # Пост нужен и для проверки ETag, и самому представлению,
+    # поэтому он загружается один раз на запрос.
+    if not hasattr(request, 'viewed_post'):
+        request.viewed_post = Post.objects.select_related(
+            'author__stats', 'group'
+        ).filter(id=post_id).first()
+    return request.viewed_post
+
+
+def get_comments_page(request, post):
+    paginator = KeysetPaginator(
+        post.comment.select_related('author'),
+        COMMENT_COUNT,
+        ordering=('created', 'id'),
+    )
+    return paginator.get_page(after=request.GET.get('after'))
+
+
+def comment_json(comment):
+    author = comment.author
+    return {
+        'id': comment.id,
+        'author': author.username if author else None,
+        'author_url': (
+            reverse('posts:profile', args=(author.username,))
+            if author else None
+        ),
+        'text': comment.text,
+        'created': comment.created,
+    }
+
+
+def post_detail_scopes(request, post_id):
+    post = get_post(request, post_id)
+    if post is None:
+        return []
+    scopes = [f'post:{post.pk}', f'author:{post.author.username}']
+    if post.group is not None:
+        scopes.append(f'group:{post.group.slug}')
+    return scopes
+
+
+@conditional_feed(lambda request: ('index',))
+@cache_feed(CACHE_TIME, lambda: ('index',), stale_timeout=STALE_CACHE_TIME)
 def index(request):
     posts = Post.objects.select_related('group', 'author').all()
-    paginator = Paginator(posts, POST_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_page_obj(request, posts)
     template = 'posts/index.html'
     title = 'Последние обновления на сайте'
     context = {
@@ -26,12 +83,12 @@ def index(request):
     return render(request, template, context)
 
 
+@conditional_feed(lambda request, slug: (f'group:{slug}',))
+@cache_feed(CACHE_TIME, lambda slug: (f'group:{slug}',))
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, POST_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.select_related('author')
+    page_obj = get_page_obj(request, posts)
     template = 'posts/group_list.html'
     context = {
         'page_obj': page_obj,
@@ -40,14 +97,15 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@conditional_feed(lambda request, username: (f'author:{username}',))
+@cache_feed(CACHE_TIME, lambda username: (f'author:{username}',))
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, POST_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    user_posts = Post.objects.filter(author__username=username)
-    post_count = user_posts.count()
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    posts = author.posts.select_related('group')
+    page_obj = get_page_obj(request, posts)
+    stats = counters.get_stats(author)
     following = False
     if request.user.is_authenticated:
         following = Follow.objects.filter(
@@ -58,7 +116,8 @@ def profile(request, username):
     title = f'Профиль пользователя {author}.'
     context = {
         'author': author,
-        'post_count': post_count,
+        'post_count': stats.posts_count,
+        'stats': stats,
         'title': title,
         'page_obj': page_obj,
         'following': following,
@@ -66,27 +125,66 @@ def profile(request, username):
     return render(request, template, context)
 
 
+def search(request):
+    text = request.GET.get('q', '').strip()
+    paginator = KeysetPaginator(
+        post_search.with_highlight(post_search.search(text)).select_related(
+            'group', 'author'
+        ),
+        POST_COUNT,
+        ordering=('search_rank', 'id'),
+    )
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    for post in page_obj:
+        post.highlighted = post_search.highlight(post.search_highlight)
+    context = {
+        'title': 'Поиск',
+        'text': text,
+        'query': urlencode({'q': text}) + '&',
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@conditional_feed(post_detail_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    posts = post.author.posts.all()
+    post = get_post(request, post_id)
+    if post is None:
+        raise Http404('Пост не найден.')
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
+    comments = get_comments_page(request, post)
     template = 'posts/post_detail.html'
     context = {
         'post': post,
-        'posts': posts,
+        'post_count': counters.get_stats(post.author).posts_count,
         'form': form,
         'comments': comments,
     }
     return render(request, template, context)
 
 
+@conditional_feed(post_detail_scopes)
+def post_comments(request, post_id):
+    post = get_post(request, post_id)
+    if post is None:
+        raise Http404('Пост не найден.')
+    page = get_comments_page(request, post)
+    return JsonResponse({
+        'comments': [comment_json(comment) for comment in page],
+        'next': page.next_cursor,
+    })
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST' and form.is_valid():
-        post = form.save(commit=True)
+        post = form.save(commit=False)
         post.author = request.user
         post.save()
         return redirect('posts:profile', post.author)
@@ -119,6 +217,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -132,10 +231,10 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, POST_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = timeline.feed(request.user)
+    page_obj = get_page_obj(
+        request, posts, ordering=('-feed_pub_date', '-feed_post_id')
+    )
     title = 'Посты авторов'
     context = {
         'page_obj': page_obj,
@@ -145,17 +244,22 @@ def follow_index(request):
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     user = request.user
     if author != user:
-        Follow.objects.get_or_create(user=user, author=author)
+        _, created = Follow.objects.get_or_create(user=user, author=author)
+        if created:
+            timeline.backfill(user, author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
-    user = get_object_or_404(Follow, user=request.user,
-                             author__username=username)
-    user.delete()
+    follow = get_object_or_404(Follow, user=request.user,
+                               author__username=username)
+    follow.delete()
+    timeline.drop(request.user, follow.author_id)
     return redirect('posts:profile', username=username)
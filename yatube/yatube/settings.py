@@ -24,11 +24,15 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ServerTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -93,6 +97,11 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static/'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# collectstatic добавляет хэш к именам и кладет рядом .gz и .br.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+STATIC_MAX_AGE = 60 * 60
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -100,9 +109,97 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-CACHES = {
-    'default': {
+# Каталоги MEDIA_ROOT, которые отдает core.views.serve_media.
+MEDIA_PUBLIC_DIRS = ('posts/', 'cache/')
+# 'nginx' — отдавать файлы через X-Accel-Redirect на internal-локацию
+# MEDIA_ACCEL_REDIRECT_PREFIX, 'apache' — через X-Sendfile, пустая
+# строка — из Python.
+MEDIA_SENDFILE_BACKEND = os.getenv('YATUBE_MEDIA_SENDFILE', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 60 * 60
+MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Загрузки больше этого размера пишутся во временный файл, а не в память.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+IMAGE_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 50_000_000
+IMAGE_UPLOAD_MAX_SIDE = 2560
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'files'),
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.getenv('YATUBE_CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+}
+CACHE_NAME = os.getenv('YATUBE_CACHE', 'locmem')
+# Поколения лент читают все воркеры, поэтому они живут в общем кэше,
+# даже если страницы кэшируются в памяти каждого процесса.
+GENERATION_CACHE = {
+    **CACHE_BACKENDS['sqlite'],
+    'LOCATION': os.path.join(CACHE_DIR, 'generations.sqlite3'),
+}
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_NAME],
+    'generations': (
+        CACHE_BACKENDS['memcached'] if CACHE_NAME == 'memcached'
+        else GENERATION_CACHE
+    ),
+}
+# Файлы метрик процессов; файлы завершившихся процессов сводятся
+# в archive.db. Тесты подменяют каталог на временный.
+METRICS_DIR = os.getenv(
+    'YATUBE_METRICS_DIR', os.path.join(CACHE_DIR, 'metrics')
+)
+METRICS_ALLOWED_IPS = os.getenv(
+    'YATUBE_METRICS_ALLOWED_IPS', '127.0.0.1,::1'
+).split(',')
+TEST_RUNNER = 'core.runner.TestRunner'
+TIMELINE_LENGTH = 1000
+TIMELINE_FANOUT_LIMIT = 5000
+TIMELINE_BATCH_SIZE = 500
+# Обработчики событий поста (лента подписок, очистка картинок)
+# выполняются после коммита и после отправки ответа; при ненулевом
+# числе потоков — в пуле потоков.
+POST_EVENT_WORKERS = int(os.getenv('YATUBE_POST_EVENT_WORKERS', 0))
+TASK_VISIBILITY_TIMEOUT = 300
+TASK_RETRY_DELAY = 10
+THUMBNAIL_BACKEND = 'posts.thumbnails.PrecomputedThumbnailBackend'
+THUMBNAIL_ENGINE = 'posts.thumbnails.PillowEngine'
+THUMBNAIL_PRESETS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+IMAGE_VARIANT_WIDTHS = (320, 640, 960, 1920)
+IMAGE_VARIANT_FORMATS = ('avif', 'webp')
+IMAGE_VARIANT_RATIO = (960, 339)
+IMAGE_VARIANT_DEFAULT_WIDTH = 960
+IMAGE_VARIANT_SIZES = (
+    '(min-width: 1200px) 1110px, (min-width: 992px) 930px, '
+    '(min-width: 768px) 690px, 100vw'
+)
+# Замеры запросов в заголовке Server-Timing и логе core.profiling;
+# на лету переключаются командой server_timing.
+SERVER_TIMING = os.getenv('YATUBE_SERVER_TIMING', '') == '1'
+SERVER_TIMING_CHECK_INTERVAL = 5
+SERVER_TIMING_DUPLICATE_THRESHOLD = 2
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.profiling': {'handlers': ['console'], 'level': 'INFO'},
+    },
 }
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'